@@ -0,0 +1,93 @@
+from .store import ExperimentStore, WINNERS
+from typing import Dict
+import argparse
+
+import numpy as np
+
+
+def win_rate_by_player_count(store: ExperimentStore, winner: str = "Werewolves") -> Dict[int, Dict[str, float]]:
+    """Fraction of games won by `winner`, grouped by the number of players."""
+    games = store.games
+    wins = games["winner"] == WINNERS.index(winner)
+    totals = np.bincount(games["num_players"])
+    won = np.bincount(games["num_players"], weights=wins)
+    return {
+        int(n): {"games": int(totals[n]), "win_rate": float(won[n] / totals[n])}
+        for n in np.nonzero(totals)[0]
+    }
+
+
+def survival_curve(store: ExperimentStore, role: str = None) -> np.ndarray:
+    """Fraction of players (optionally of one role) still alive after each round, starting at round 0."""
+    players = store.players
+    mask = np.ones(len(players["role"]), dtype=bool) if role is None else players["role"] == store.role_code(role)
+    if not mask.any():
+        return np.ones(1)
+
+    elimination_round = players["elimination_round"][mask]
+    max_round = int(store.games["rounds"].max()) if store.num_games else 0
+    eliminated_by = np.bincount(elimination_round[elimination_round >= 0], minlength=max_round + 1).cumsum()
+    return 1.0 - eliminated_by / mask.sum()
+
+
+def vote_role_matrix(store: ExperimentStore) -> np.ndarray:
+    """Share of each voter role's votes that went to each target role (rows: voter role, columns: target role)."""
+    votes = store.votes
+    n = len(store.roles)
+    counts = np.zeros((n, n))
+    np.add.at(counts, (votes["voter_role"], votes["target_role"]), 1)
+    return counts / np.maximum(counts.sum(axis=1, keepdims=True), 1)
+
+
+def vote_agreement_matrix(store: ExperimentStore) -> np.ndarray:
+    """Probability that two voters of the given roles picked the same target in the same vote.
+
+    Entry [a, b] is (pairs of a/b voters agreeing) / (pairs of a/b voters), over every round of every game,
+    and NaN where no such pair ever voted together (e.g. werewolf/werewolf with one werewolf per game).
+    """
+    votes = store.votes
+    n = len(store.roles)
+    if len(votes["game"]) == 0:
+        return np.zeros((n, n))
+
+    # Rounds are numbered per game, so (game, round) identifies one vote; both pairs are packed into
+    # single int64 keys so that plain 1-D unique and bincount do the grouping
+    game = votes["game"].astype(np.int64)
+    round_number = votes["round"].astype(np.int64)
+    target = votes["target"].astype(np.int64)
+    voter_role = votes["voter_role"].astype(np.int64)
+    _, ballot = np.unique(game * (round_number.max() + 1) + round_number, return_inverse=True)
+    _, choice = np.unique(ballot * (target.max() + 1) + target, return_inverse=True)
+    ballot, choice = ballot.ravel(), choice.ravel()
+
+    num_ballots, num_choices = ballot.max() + 1, choice.max() + 1
+    per_ballot = np.bincount(ballot * n + voter_role, minlength=num_ballots * n).reshape(num_ballots, n).astype(float)
+    per_choice = np.bincount(choice * n + voter_role, minlength=num_choices * n).reshape(num_choices, n).astype(float)
+
+    # Ordered pairs of distinct voters: outer products minus each voter paired with itself
+    total_pairs = per_ballot.T @ per_ballot - np.diag(per_ballot.sum(axis=0))
+    agreeing_pairs = per_choice.T @ per_choice - np.diag(per_choice.sum(axis=0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total_pairs > 0, agreeing_pairs / total_pairs, np.nan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print aggregate statistics from an experiment store.")
+    parser.add_argument("store", help="Path of an .npz store created by analysis.store.")
+    args = parser.parse_args()
+
+    store = ExperimentStore.load(args.store)
+    print(f"Games: {store.num_games}")
+    for n, stats in win_rate_by_player_count(store).items():
+        print(f"  {n} players: werewolf win rate {stats['win_rate']:.3f} over {stats['games']} games")
+    print(f"Roles: {store.roles}")
+    print("Vote share by role (rows vote for columns):")
+    print(vote_role_matrix(store).round(3))
+    print("Vote agreement by role:")
+    print(vote_agreement_matrix(store).round(3))
+    for role in store.roles:
+        print(f"{role} survival by round: {survival_curve(store, role).round(3).tolist()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+from game.log_sink import load_game_log
+from typing import Dict, Iterable, List
+import argparse
+import glob
+import os
+
+import numpy as np
+
+
+WINNERS = [None, "Villagers", "Werewolves"]
+REASONS = ["Werewolf Attack", "Town Lynch"]
+
+TABLES = {
+    "games": ["num_players", "num_werewolves", "rounds", "winner"],
+    "players": ["game", "player", "role", "elimination_round"],
+    "votes": ["game", "round", "voter", "target", "voter_role", "target_role"],
+    "eliminations": ["game", "round", "player", "role", "reason"],
+}
+
+
+class _Vocabulary:
+    def __init__(self, values: Iterable[str] = ()):
+        self.values = list(values)
+        self.index = {v: i for i, v in enumerate(self.values)}
+
+    def code(self, value: str) -> int:
+        if value not in self.index:
+            self.index[value] = len(self.values)
+            self.values.append(value)
+        return self.index[value]
+
+
+class ExperimentStore:
+    """Columnar tables of games, players, votes and eliminations backed by NumPy arrays.
+
+    Every table is a dict of equal-length int32 columns. Player names and roles are
+    dictionary-encoded through `names` and `roles`; `winner` and `reason` index into
+    WINNERS and REASONS. Rows in the other tables point at their game by row number.
+    """
+
+    def __init__(self, tables: Dict[str, Dict[str, np.ndarray]] = None, names: List[str] = (), roles: List[str] = (), files: List[str] = ()):
+        self.tables = tables or {t: {c: np.zeros(0, dtype=np.int32) for c in cols} for t, cols in TABLES.items()}
+        self.names = list(names)
+        self.roles = list(roles)
+        self.files = list(files)
+
+    def __getattr__(self, table: str) -> Dict[str, np.ndarray]:
+        if table in TABLES:
+            return self.tables[table]
+        raise AttributeError(table)
+
+    @property
+    def num_games(self) -> int:
+        return len(self.tables["games"]["rounds"])
+
+    def role_code(self, role: str) -> int:
+        return self.roles.index(role) if role in self.roles else -1
+
+    def ingest(self, file_paths: Iterable[str]) -> int:
+        """Appends every log not already in the store and returns how many were added."""
+        names, roles = _Vocabulary(self.names), _Vocabulary(self.roles)
+        rows = {t: {c: [] for c in cols} for t, cols in TABLES.items()}
+        known = set(self.files)
+        added = 0
+
+        for file_path in file_paths:
+            file_id = os.path.basename(file_path)
+            if file_id in known:
+                continue
+            game = self.num_games + added
+            _append_game(rows, load_game_log(file_path), game, names, roles)
+            self.files.append(file_id)
+            known.add(file_id)
+            added += 1
+
+        for table, columns in rows.items():
+            for column, values in columns.items():
+                new = np.asarray(values, dtype=np.int32)
+                self.tables[table][column] = np.concatenate([self.tables[table][column], new])
+        self.names, self.roles = names.values, roles.values
+        return added
+
+    def save(self, path: str):
+        arrays = {f"{t}.{c}": a for t, cols in self.tables.items() for c, a in cols.items()}
+        np.savez_compressed(
+            path,
+            names=np.asarray(self.names, dtype=str),
+            roles=np.asarray(self.roles, dtype=str),
+            files=np.asarray(self.files, dtype=str),
+            **arrays
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "ExperimentStore":
+        with np.load(path) as data:
+            tables = {t: {c: data[f"{t}.{c}"] for c in cols} for t, cols in TABLES.items()}
+            return cls(tables, data["names"].tolist(), data["roles"].tolist(), data["files"].tolist())
+
+
+def _append_game(rows: Dict, log: Dict, game: int, names: _Vocabulary, roles: _Vocabulary):
+    players = log.get("players", {})
+    player_roles = {name: info["role"] for name, info in players.items()}
+    eliminated_in = {}
+
+    for entry in log.get("log", []):
+        details = entry.get("details", {})
+        if entry["event_type"] == "VOTE":
+            voter, target = details["voter"], details["target"]
+            _append_row(rows["votes"], game=game, round=entry["round"], voter=names.code(voter), target=names.code(target),
+                        voter_role=roles.code(player_roles.get(voter, "Unknown")), target_role=roles.code(player_roles.get(target, "Unknown")))
+        elif entry["event_type"] == "ELIMINATION":
+            player = details["player"]
+            eliminated_in[player] = entry["round"]
+            _append_row(rows["eliminations"], game=game, round=entry["round"], player=names.code(player),
+                        role=roles.code(details.get("role", "Unknown")), reason=REASONS.index(details.get("reason")) if details.get("reason") in REASONS else -1)
+
+    for name, role in player_roles.items():
+        _append_row(rows["players"], game=game, player=names.code(name), role=roles.code(role), elimination_round=eliminated_in.get(name, -1))
+
+    winner = log.get("winner")
+    _append_row(rows["games"], num_players=len(players), num_werewolves=sum(r == "Werewolf" for r in player_roles.values()),
+                rounds=log.get("rounds_played", 0), winner=WINNERS.index(winner) if winner in WINNERS else 0)
+
+
+def _append_row(table: Dict[str, list], **values):
+    for column, value in values.items():
+        table[column].append(value)
+
+
+def find_logs(log_dir: str) -> List[str]:
+    patterns = ["game_*.json", "game_*.jsonl", "game_*.jsonl.gz", "game_*.jsonl.zst"]
+    return sorted(p for pattern in patterns for p in glob.glob(os.path.join(log_dir, pattern)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact saved game logs into a columnar experiment store.")
+    parser.add_argument("log_dir", help="Directory containing saved game logs.")
+    parser.add_argument("store", help="Path of the .npz store to create or extend.")
+    args = parser.parse_args()
+
+    store = ExperimentStore.load(args.store) if os.path.exists(args.store) else ExperimentStore()
+    added = store.ingest(find_logs(args.log_dir))
+    store.save(args.store)
+    print(f"Ingested {added} new games ({store.num_games} total) into {args.store}")
+
+
+if __name__ == "__main__":
+    main()
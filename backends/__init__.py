@@ -1,3 +1,11 @@
 from .backend import Backend
 from .human_backend import HumanBackend
-from .hf_llm_backend import LocalTransformerBackend
\ No newline at end of file
+from .mock_backend import MockBackend
+from .registry import available_backends, create_backend, get_backend_class, register_backend
+
+
+def __getattr__(name):
+    # Loading the transformer backend imports torch/transformers, so it only happens on first use
+    if name == "LocalTransformerBackend":
+        return get_backend_class("hf")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
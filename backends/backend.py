@@ -1,7 +1,16 @@
 from abc import ABC, abstractmethod
+from instrumentation import METRICS
 from typing import List, Dict, Union
+import asyncio
 
 class Backend(ABC):
+
+    # Backends whose target selections can be generated together expose a non-None key
+    # plus `prepare_target_selection`, `_generate_batch` and `finish_target_selection`.
+    batch_key = None
+
+    # Where generation stats are recorded; the moderator points this at its own game's recorder
+    metrics = METRICS
     
     def __init__(self, name: str):
         self.name = name
@@ -12,4 +21,30 @@ class Backend(ABC):
 
     @abstractmethod
     def get_target_selection(self, game_context: Dict, valid_targets: List[str]) -> str:
+        pass
+
+    # Async variants used by AsyncModerator. By default the blocking call runs in a worker
+    # thread so one slow seat (a model call, a human typing) does not stall the event loop.
+    async def aget_discussion_text(self, game_context: Dict) -> str:
+        return await asyncio.to_thread(self.get_discussion_text, game_context)
+
+    async def aget_target_selection(self, game_context: Dict, valid_targets: List[str]) -> str:
+        return await asyncio.to_thread(self.get_target_selection, game_context, valid_targets)
+
+    # Longest prompt the backend's model accepts, or None if it has no fixed limit
+    max_prompt_tokens = None
+
+    def count_tokens(self, text: str) -> int:
+        """Prompt length of `text` for this backend's model; roughly four characters per token by default."""
+        return (len(text) + 3) // 4
+
+    def get_state(self):
+        """JSON-serializable internal state (e.g. an RNG) saved in game checkpoints."""
+        return None
+
+    def set_state(self, state):
+        pass
+
+    def release(self):
+        """Frees any shared resources (e.g. model weights) held by this backend."""
         pass
\ No newline at end of file
@@ -0,0 +1,39 @@
+from .backend import Backend
+from typing import Dict, List, Tuple
+
+
+class GenerationEngine:
+    """Answers a phase's worth of independent target selections with as few `generate` calls as possible.
+
+    Jobs whose backends share a `batch_key` are submitted as one padded batch; all other
+    backends (e.g. humans) are asked one at a time. Results come back in job order.
+    """
+
+    def __init__(self, max_batch_size: int = 16):
+        self.max_batch_size = max_batch_size
+
+    def run_target_selections(self, jobs: List[Tuple[Backend, Dict, List[str]]]) -> List[Dict]:
+        results = [None] * len(jobs)
+        batches = {}
+
+        for i, (backend, context, valid_targets) in enumerate(jobs):
+            if backend.batch_key is None:
+                results[i] = backend.get_target_selection(context, valid_targets)
+            else:
+                batches.setdefault(backend.batch_key, []).append(i)
+
+        for indices in batches.values():
+            for start in range(0, len(indices), self.max_batch_size):
+                chunk = indices[start:start + self.max_batch_size]
+                if len(chunk) == 1:
+                    backend, context, valid_targets = jobs[chunk[0]]
+                    results[chunk[0]] = backend.get_target_selection(context, valid_targets)
+                    continue
+
+                prompts = [jobs[i][0].prepare_target_selection(jobs[i][1], jobs[i][2]) for i in chunk]
+                outputs = jobs[chunk[0]][0]._generate_batch(prompts)
+                for i, response_data in zip(chunk, outputs):
+                    backend, _, valid_targets = jobs[i]
+                    results[i] = backend.finish_target_selection(response_data, valid_targets)
+
+        return results
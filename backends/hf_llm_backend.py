@@ -1,7 +1,12 @@
 from .backend import Backend
+from .model_registry import MODEL_REGISTRY
+from .prefix_cache import PrefixCache
+from .stopping import TurnBoundaryCriteria, strip_turn_marker
+from . import prompts
 from typing import Dict, List 
+import copy
+import time
 try:
-    from transformers import AutoModelForCausalLM, AutoTokenizer
     import torch
     
     # Check for GPU
@@ -10,36 +15,112 @@ except ImportError:
     print("Warning: PyTorch and/or Transformers not installed. LocalTransformerProvider will not work.")
     DEVICE = "cpu"
 
+def _max_prompt_tokens(model_config, token_budgets: Dict[str, int]):
+    # Room is left for the longest generation any phase may append
+    positions = getattr(model_config, "max_position_embeddings", None)
+    return None if positions is None else positions - max([50, *token_budgets.values()])
+
+
+def load_prompt_sizing(model_name: str, token_budgets: Dict[str, int] = None):
+    """(count_tokens, max_prompt_tokens) exactly as LocalTransformerBackend reports them for `model_name`,
+    from its tokenizer and config alone, without loading the weights."""
+    from transformers import AutoConfig, AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    max_prompt_tokens = _max_prompt_tokens(AutoConfig.from_pretrained(model_name), token_budgets or {})
+    return (lambda text: len(tokenizer(text).input_ids)), max_prompt_tokens
+
+
 class LocalTransformerBackend(Backend):
 
-    def __init__(self, name: str, model_name: str = "openai-community/gpt2", preprocessing_model=None):
+    def __init__(self, name: str, model_name: str = "openai-community/gpt2", preprocessing_model=None, dtype: str = "float32", prefix_cache_mb: int = 256, compile_model: bool = False, selection_mode: str = "generate",
+                 draft_model: str = None, fast_decoding: bool = False, token_budgets: Dict[str, int] = None):
         super().__init__(name)
-        print(f"[{self.name}] Loading local model: {model_name} on {DEVICE}...")
+        print(f"[{self.name}] Using local model: {model_name} on {DEVICE}...")
+
+        # Players running the same model share one copy of the weights through the registry
+        self.model_handle = MODEL_REGISTRY.acquire(model_name, dtype=dtype, device=DEVICE, compile_model=compile_model)
+        self.tokenizer = self.model_handle.tokenizer
+        self.model = self.model_handle.model
 
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForCausalLM.from_pretrained(model_name).to(DEVICE)
+        # The per-player preamble is encoded once and its key/values reused on later turns
+        if prefix_cache_mb > 0 and self.model_handle.prefix_cache is None:
+            self.model_handle.prefix_cache = PrefixCache(max_bytes=prefix_cache_mb * 1024 * 1024)
+        self.prefix_cache = self.model_handle.prefix_cache if prefix_cache_mb > 0 else None
+        self._last_prefix = {}
         
         self.preprocessing_model = preprocessing_model
+
+        # "generate" samples an answer and searches it for a name; "score" ranks the names by likelihood
+        if selection_mode not in ("generate", "score"):
+            raise ValueError(f"Unknown selection mode: {selection_mode}")
+        self.selection_mode = selection_mode
+
+        # A small model with the same vocabulary drafts tokens that the main model verifies (assisted decoding)
+        self.draft_handle = None
+        if draft_model:
+            self.draft_handle = MODEL_REGISTRY.acquire(draft_model, dtype=dtype, device=DEVICE)
+            if len(self.draft_handle.tokenizer) != len(self.tokenizer):
+                self.release()
+                raise ValueError(f"Draft model {draft_model} does not share {model_name}'s vocabulary.")
+
+        # Ends turns at a sentence or speaker boundary instead of always running to max_new_tokens
+        self.fast_decoding = fast_decoding
+        # max_new_tokens per phase ("discussion", "selection"); 50 for phases not listed
+        self.token_budgets = token_budgets or {}
         
-        print(f"[{self.name}] Model loaded successfully.")
+        print(f"[{self.name}] Model ready.")
+
+    def release(self):
+        if self.model_handle is not None:
+            MODEL_REGISTRY.release(self.model_handle)
+            if self.draft_handle is not None:
+                MODEL_REGISTRY.release(self.draft_handle)
+                self.draft_handle = None
+            self.model_handle = None
+            self.tokenizer = None
+            self.model = None
+            self.prefix_cache = None
+
+    @property
+    def batch_key(self):
+        # Prompts from backends sharing a model handle can be generated together;
+        # scored selections already run as a single forward pass each, and assisted decoding takes one prompt at a time
+        if self.model_handle is None or self.selection_mode == "score" or self.draft_handle is not None:
+            return None
+        return self.model_handle.key
+
+    @property
+    def max_prompt_tokens(self):
+        return _max_prompt_tokens(self.model.config, self.token_budgets)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer(text).input_ids)
 
-    def _generate_response(self, prompt: str) -> str:
+    def _preprocess_prompt(self, prompt: str) -> str:
         if self.preprocessing_model:
             prompt = self.preprocessing_model(prompt)
             print(f"DEBUG: Processed prompt length: {len(prompt)}")
-        
-        inputs = self.tokenizer(prompt, return_tensors="pt").to(DEVICE)
-        
-        outputs = self.model.generate(
-            **inputs,
-            max_new_tokens=50,
-            do_sample=True,
-            top_k=50,
-            top_p=0.95
-        )
-        
-        response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+        return prompt
+
+    def _generation_kwargs(self, input_ids=None, phase: str = None) -> Dict:
+        kwargs = {
+            "max_new_tokens": self.token_budgets.get(phase, 50),
+            "do_sample": True,
+            "top_k": 50,
+            "top_p": 0.95,
+            "pad_token_id": self.tokenizer.pad_token_id,
+        }
+        if self.draft_handle is not None:
+            kwargs["assistant_model"] = self.draft_handle.model
+        if self.fast_decoding and input_ids is not None:
+            kwargs["stopping_criteria"] = [TurnBoundaryCriteria(self.tokenizer, input_ids.tolist())]
+        return kwargs
+
+    def _build_response(self, prompt: str, response: str) -> Dict:
         cleaned_text = response.strip()
+        if self.fast_decoding:
+            # Generation stops right after a new speaker's "Name:", which is not part of this turn
+            cleaned_text = strip_turn_marker(cleaned_text)
         # # Cleanup for testing, maybe remove later
         # if len(response.split('.')) > 1:
         #     return response.split('.')[-2].strip() + '.'
@@ -51,28 +132,158 @@ class LocalTransformerBackend(Backend):
             "final_decision": cleaned_text    # The processed text used by the game
         }
 
+    def _prefix_state(self, prefix: str, kind: str = None):
+        cached = self.prefix_cache.get(prefix)
+        if cached is not None:
+            self._last_prefix[kind] = prefix
+            return cached
+
+        # A game transcript only grows between turns, so this player's previous prefix is usually
+        # still a prefix of the new one and only the text added since then has to be encoded
+        previous = self._last_prefix.get(kind)
+        base = self.prefix_cache.get(previous) if previous and prefix.startswith(previous) else None
+        with torch.inference_mode():
+            if base is not None:
+                base_ids, base_past = base
+                new_ids = self.tokenizer(prefix[len(previous):], return_tensors="pt").input_ids.to(DEVICE)
+                past_key_values = self.model(input_ids=new_ids, past_key_values=copy.deepcopy(base_past), use_cache=True).past_key_values
+                prefix_ids = torch.cat([base_ids, new_ids], dim=1)
+            else:
+                prefix_ids = self.tokenizer(prefix, return_tensors="pt").input_ids.to(DEVICE)
+                past_key_values = self.model(input_ids=prefix_ids, use_cache=True).past_key_values
+        self.prefix_cache.put(prefix, prefix_ids, past_key_values)
+        self._last_prefix[kind] = prefix
+        return prefix_ids, past_key_values
+
+    def _generate_response(self, prompt: str, prefix: str = None, kind: str = "generate") -> str:
+        prompt = self._preprocess_prompt(prompt)
+        with self.model_handle.lock, torch.inference_mode():
+            return self._build_response(prompt, self._generate_text(prompt, prefix, kind))
+
+    def _generate_text(self, prompt: str, prefix: str = None, kind: str = "generate") -> str:
+        start = time.perf_counter()
+        if self.prefix_cache is not None and prefix and len(prefix) < len(prompt) and prompt.startswith(prefix):
+            # Only the tokens after the cached prefix go through the model; generate() mutates
+            # the cache it is given, so it gets a copy and the stored entry stays reusable
+            prefix_ids, past_key_values = self._prefix_state(prefix, kind)
+            suffix_ids = self.tokenizer(prompt[len(prefix):], return_tensors="pt").input_ids.to(DEVICE)
+            input_ids = torch.cat([prefix_ids, suffix_ids], dim=1)
+            inputs = {
+                "input_ids": input_ids,
+                "attention_mask": torch.ones_like(input_ids),
+                "past_key_values": copy.deepcopy(past_key_values),
+            }
+        else:
+            inputs = self.tokenizer(prompt, return_tensors="pt").to(DEVICE)
+        tokenized = time.perf_counter()
+
+        outputs = self.model.generate(**inputs, **self._generation_kwargs(inputs["input_ids"], kind))
+        generated = time.perf_counter()
+
+        prompt_tokens = inputs["input_ids"].shape[1]
+        self.metrics.record_generation(kind, prompt_tokens, outputs.shape[1] - prompt_tokens, tokenized - start, generated - tokenized)
+        return self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+
+    def _generate_batch(self, prompts: List[str], kind: str = "selection_batch", phase: str = "selection") -> List[Dict]:
+        """Runs a single left-padded `generate` call for prompts that share this backend's model.
+
+        Left padding shifts every prompt by a different amount, so batches bypass the prefix cache.
+        """
+        with self.model_handle.lock, torch.inference_mode():
+            start = time.perf_counter()
+            inputs = self.tokenizer(prompts, return_tensors="pt", padding=True).to(DEVICE)
+            tokenized = time.perf_counter()
+
+            outputs = self.model.generate(**inputs, **self._generation_kwargs(inputs["input_ids"], phase))
+            generated = time.perf_counter()
+
+            responses = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+        # Rows that stop early are padded to the longest one; only the tokens actually generated count
+        new_tokens = int((outputs[:, inputs["input_ids"].shape[1]:] != self.tokenizer.pad_token_id).sum())
+        self.metrics.record_generation(kind, int(inputs["attention_mask"].sum()), new_tokens, tokenized - start, generated - tokenized)
+        return [self._build_response(prompt, response) for prompt, response in zip(prompts, responses)]
+
 
     def get_discussion_text(self, game_context: Dict) -> str:
         prompt = self._create_discussion_prompt(game_context)
-        return self._generate_response(prompt)
+        return self._generate_response(prompt, prefix=self._discussion_preamble(game_context), kind="discussion")
 
 
     def get_target_selection(self, game_context: Dict, valid_targets: List[str]) -> str:
 
         prompt = self._create_selection_prompt(game_context, valid_targets)
-        response_data = self._generate_response(prompt)
-        
-        parsed_target_name = valid_targets[0] # Fallback
-        for target in valid_targets:
-            if target.lower() in response_data['final_decision'].lower():
-                parsed_target_name = target
-                break
+        if self.selection_mode == "score":
+            return self._score_target_selection(self._preprocess_prompt(prompt), valid_targets)
+
+        response_data = self._generate_response(prompt, prefix=self._selection_preamble(game_context), kind="selection")
+        return self.finish_target_selection(response_data, valid_targets)
+
+    def _target_logprobs(self, prompt: str, valid_targets: List[str]) -> List[float]:
+        """Log-probability of each target name following the prompt.
+
+        The prompt is encoded once and its cache is shared by every target, so only the target
+        tokens go through the model per target, and the vocabulary softmax is only taken at them.
+        """
+        start = time.perf_counter()
+        prompt_ids = self.tokenizer(prompt, return_tensors="pt").input_ids.to(DEVICE)
+        target_ids = [self.tokenizer(" " + target).input_ids for target in valid_targets]
+        max_len = max(len(ids) for ids in target_ids)
+
+        pad_id = self.tokenizer.pad_token_id
+        input_ids = torch.tensor([ids + [pad_id] * (max_len - len(ids)) for ids in target_ids], device=DEVICE)
+        target_mask = torch.tensor([[1] * len(ids) + [0] * (max_len - len(ids)) for ids in target_ids], device=DEVICE)
+
+        tokenized = time.perf_counter()
+
+        with self.model_handle.lock, torch.inference_mode():
+            prompt_out = self.model(input_ids=prompt_ids, use_cache=True, logits_to_keep=1)
+            # The prompt's last position predicts every target's first token
+            logprobs = torch.log_softmax(prompt_out.logits[0, -1].float(), dim=-1)[input_ids[:, 0]]
+            if max_len > 1:
+                past_key_values = prompt_out.past_key_values
+                past_key_values.batch_repeat_interleave(len(valid_targets))
+                attention_mask = torch.cat([torch.ones(len(valid_targets), prompt_ids.shape[1], dtype=target_mask.dtype, device=DEVICE), target_mask], dim=1)
+                logits = self.model(input_ids=input_ids, attention_mask=attention_mask, past_key_values=past_key_values).logits
+                # Target position t predicts target token t + 1
+                rest = torch.log_softmax(logits[:, :-1].float(), dim=-1).gather(2, input_ids[:, 1:, None]).squeeze(2)
+                logprobs = logprobs + (rest * target_mask[:, 1:]).sum(dim=1)
+
+        self.metrics.record_generation("selection_score", prompt_ids.shape[1] + int(target_mask.sum()), 0, tokenized - start, time.perf_counter() - tokenized)
+        return logprobs.tolist()
+
+    def _score_target_selection(self, prompt: str, valid_targets: List[str]) -> Dict:
+        logprobs = self._target_logprobs(prompt, valid_targets)
+        probabilities = torch.softmax(torch.tensor(logprobs), dim=0).tolist()
+        best = max(range(len(valid_targets)), key=lambda i: logprobs[i])
+
+        return {
+            "source": "LLM",
+            "prompt_used": prompt,
+            "raw_llm_output": valid_targets[best], # No text is generated in scoring mode
+            "final_decision": valid_targets[best],
+            "selection_mode": "score",
+            "target_logprobs": dict(zip(valid_targets, logprobs)),
+            "target_probabilities": dict(zip(valid_targets, probabilities)),
+        }
+
+    def prepare_target_selection(self, game_context: Dict, valid_targets: List[str]) -> str:
+        return self._preprocess_prompt(self._create_selection_prompt(game_context, valid_targets))
+
+    def finish_target_selection(self, response_data: Dict, valid_targets: List[str]) -> Dict:
+        parsed_target_name = prompts.parse_target(response_data['final_decision'], valid_targets)
 
         response_data["final_decision"] = parsed_target_name # The actual selected name
         return response_data
 
+    def _discussion_preamble(self, context: Dict) -> str:
+        return prompts.discussion_preamble(self.name, context)
+
+    def _selection_preamble(self, context: Dict) -> str:
+        return prompts.selection_preamble(self.name, context)
+
     def _create_discussion_prompt(self, context: Dict) -> str:
-        return f"You are playing the game Werewolf as a {context['role']} named {self.name}. The current status is: {context['status']}. Who do you suspect and what do you say to the group?"
+        return prompts.discussion_prompt(self.name, context)
 
     def _create_selection_prompt(self, context: Dict, targets: List[str]) -> str:
-        return f"You are a {context['role']} named {self.name}. You must select one person to eliminate. The options are: {', '.join(targets)}. Based on the context: {context['status']}, who do you select? Respond ONLY with the name."
\ No newline at end of file
+        return prompts.selection_prompt(self.name, context, targets)
\ No newline at end of file
@@ -1,7 +1,22 @@
 from .backend import Backend
 from typing import Dict, List
+import asyncio
+import threading
 
 class HumanBackend(Backend):
+    # Only one human can use the terminal at a time, even when seats are asked concurrently
+    _terminal_lock = threading.Lock()
+
+    def _with_terminal(self, ask, *args):
+        with HumanBackend._terminal_lock:
+            return ask(*args)
+
+    async def aget_discussion_text(self, game_context: Dict) -> str:
+        return await asyncio.to_thread(self._with_terminal, self.get_discussion_text, game_context)
+
+    async def aget_target_selection(self, game_context: Dict, valid_targets: List[str]) -> str:
+        return await asyncio.to_thread(self._with_terminal, self.get_target_selection, game_context, valid_targets)
+
     def get_discussion_text(self, game_context: Dict) -> str:
         print(f"\n[{self.name} - Discussion] What do you say? (Enter text):")
         human_input = input("> ")
@@ -0,0 +1,203 @@
+"""Localhost HTTP inference server that lets many games share one copy of a model.
+
+Start it once, then point any number of games (or worker processes) at it with
+`--backend remote --server http://127.0.0.1:8765`:
+
+    python -m backends.inference_server --model openai-community/gpt2 --port 8765
+
+Generation requests from all clients go into one queue. A scheduler thread collects whatever
+arrives within `max_wait_ms` (up to `max_batch_size` prompts) and runs it as a single padded
+`generate` call; a lone prompt keeps using the per-player prefix cache instead. Requests of
+different kinds (discussion, selection) have different token budgets, so they never share a batch.
+"""
+from .hf_llm_backend import LocalTransformerBackend
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+import argparse
+import json
+import queue
+import threading
+import time
+
+
+class _PendingRequest:
+    """One client request waiting for the scheduler to fill in its responses."""
+
+    def __init__(self, prompts: List[str], prefix: str = None, kind: str = "generate"):
+        self.prompts = prompts
+        self.prefix = prefix
+        self.kind = kind
+        self.responses = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class InferenceServer:
+
+    def __init__(self, model_name: str, dtype: str = "float32", compile_model: bool = False, prefix_cache_mb: int = 256,
+                 host: str = "127.0.0.1", port: int = 8765, max_batch_size: int = 32, max_wait_ms: float = 10.0):
+        self.backend = LocalTransformerBackend("InferenceServer", model_name=model_name, dtype=dtype,
+                                               prefix_cache_mb=prefix_cache_mb, compile_model=compile_model)
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue()
+        # Requests pulled from the queue while collecting a batch of another kind, oldest first
+        self._deferred = []
+        self.batches_run = 0
+        self.prompts_served = 0
+
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        self._scheduler = threading.Thread(target=self._schedule, name="inference-scheduler", daemon=True)
+
+    def submit(self, prompts: List[str], prefix: str = None, kind: str = "generate") -> List[Dict]:
+        """Queues prompts for the scheduler and blocks until their responses are ready."""
+        request = _PendingRequest(prompts, prefix, kind)
+        self.queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.responses
+
+    def _collect_batch(self, first: _PendingRequest) -> List[_PendingRequest]:
+        batch = [first]
+        num_prompts = len(first.prompts)
+        waiting = []
+        for request in self._deferred:
+            if request.kind == first.kind and num_prompts < self.max_batch_size:
+                batch.append(request)
+                num_prompts += len(request.prompts)
+            else:
+                waiting.append(request)
+        self._deferred = waiting
+
+        deadline = time.monotonic() + self.max_wait
+        while num_prompts < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Shutdown sentinel; put it back so the loop exits after this batch
+                self.queue.put(None)
+                break
+            if request.kind != first.kind:
+                self._deferred.append(request)
+                continue
+            batch.append(request)
+            num_prompts += len(request.prompts)
+        return batch
+
+    def _schedule(self):
+        while True:
+            first = self._deferred.pop(0) if self._deferred else self.queue.get()
+            if first is None:
+                return
+            batch = self._collect_batch(first)
+            try:
+                if len(batch) == 1 and len(first.prompts) == 1:
+                    first.responses = [self.backend._generate_response(first.prompts[0], prefix=first.prefix, kind=first.kind)]
+                else:
+                    prompts = [prompt for request in batch for prompt in request.prompts]
+                    responses = []
+                    for start in range(0, len(prompts), self.max_batch_size):
+                        responses.extend(self.backend._generate_batch(prompts[start:start + self.max_batch_size], kind="server_batch", phase=first.kind))
+                    for request in batch:
+                        request.responses, responses = responses[:len(request.prompts)], responses[len(request.prompts):]
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+            self.batches_run += 1
+            self.prompts_served += sum(len(request.prompts) for request in batch)
+            for request in batch:
+                request.done.set()
+
+    def status(self) -> Dict:
+        return {
+            "model": self.model_name,
+            "batches_run": self.batches_run,
+            "prompts_served": self.prompts_served,
+            "queued": self.queue.qsize(),
+            "metrics": self.backend.metrics.summary(),
+        }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def _send_json(self, status: int, payload: Dict):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/status":
+                    self._send_json(200, server.status())
+                else:
+                    self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+            def do_POST(self):
+                try:
+                    request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                    if self.path == "/generate":
+                        responses = server.submit(request["prompts"], request.get("prefix"), request.get("kind", "generate"))
+                        self._send_json(200, {"responses": responses})
+                    elif self.path == "/score":
+                        # A scoring pass is a single forward call, so it skips the generation queue
+                        self._send_json(200, server.backend._score_target_selection(request["prompt"], request["targets"]))
+                    else:
+                        self._send_json(404, {"error": f"Unknown path: {self.path}"})
+                except Exception as e:
+                    self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._scheduler.start()
+        threading.Thread(target=self.httpd.serve_forever, name="inference-http", daemon=True).start()
+        print(f"[InferenceServer] Serving {self.model_name} at {self.url}")
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.queue.put(None)
+        self._scheduler.join()
+        self.backend.release()
+
+
+def main():
+    from experiment import PRECISIONS
+
+    parser = argparse.ArgumentParser(description="Serve one model to many concurrent games over localhost HTTP.")
+    parser.add_argument("-m", "--model", default="openai-community/gpt2")
+    parser.add_argument("--precision", choices=list(PRECISIONS), default="fp32")
+    parser.add_argument("--compile", action="store_true")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch-size", type=int, default=32, help="Most prompts run in one generate call.")
+    parser.add_argument("--max-wait-ms", type=float, default=10.0, help="How long the scheduler waits to fill a batch.")
+    args = parser.parse_args()
+
+    server = InferenceServer(args.model, dtype=PRECISIONS[args.precision], compile_model=args.compile, host=args.host,
+                             port=args.port, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("\n[InferenceServer] Shutting down.")
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+from .backend import Backend
+from . import prompts
+from typing import Dict, List
+import random
+import time
+
+_FILLER_WORDS = [
+    "I", "think", "we", "should", "watch", "vote", "for", "suspicious", "quiet", "last",
+    "night", "someone", "is", "lying", "trust", "me", "the", "village", "werewolf", "round",
+]
+
+
+class MockBackend(Backend):
+    """Scripted/stochastic stand-in for an LLM player that never touches torch or transformers.
+
+    Responses have the same shape as LocalTransformerBackend's. Generation cost is simulated as
+    `latency + generated_tokens / tokens_per_second` seconds of sleep, so moderator overhead,
+    logging and the batched/parallel paths can be benchmarked without a model.
+    """
+
+    def __init__(self, name: str, seed: int = None, latency: float = 0.0, tokens_per_second: float = None,
+                 max_new_tokens: int = 50, script: List[str] = None, batched: bool = False):
+        super().__init__(name)
+        # Without an explicit seed, draw from the global RNG so seeded games stay reproducible
+        self.rng = random.Random(seed if seed is not None else random.getrandbits(64))
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.max_new_tokens = max_new_tokens
+        self.script = script
+        self._script_position = 0
+        self.batch_key = "mock" if batched else None
+
+    def get_state(self):
+        version, internal, gauss_next = self.rng.getstate()
+        return {"rng": [version, list(internal), gauss_next], "script_position": self._script_position}
+
+    def set_state(self, state):
+        if state:
+            version, internal, gauss_next = state["rng"]
+            self.rng.setstate((version, tuple(internal), gauss_next))
+            self._script_position = state["script_position"]
+
+    def _simulate_generation(self, num_tokens: int):
+        delay = self.latency
+        if self.tokens_per_second:
+            delay += num_tokens / self.tokens_per_second
+        if delay > 0:
+            time.sleep(delay)
+
+    def _fake_text(self) -> str:
+        if self.script:
+            text = self.script[self._script_position % len(self.script)]
+            self._script_position += 1
+            return text
+        num_tokens = self.rng.randint(self.max_new_tokens // 2, self.max_new_tokens)
+        return " ".join(self.rng.choice(_FILLER_WORDS) for _ in range(num_tokens))
+
+    def _build_response(self, prompt: str, generated: str) -> Dict:
+        response = f"{prompt} {generated}"
+        return {
+            "source": "LLM",
+            "prompt_used": prompt,
+            "raw_llm_output": response,
+            "final_decision": response.strip()
+        }
+
+    def get_discussion_text(self, game_context: Dict) -> str:
+        prompt = prompts.discussion_prompt(self.name, game_context)
+        generated = self._fake_text()
+        self._simulate_generation(len(generated.split()))
+        return self._build_response(prompt, generated)
+
+    def get_target_selection(self, game_context: Dict, valid_targets: List[str]) -> str:
+        prompt = self.prepare_target_selection(game_context, valid_targets)
+        self._simulate_generation(1)
+        return self.finish_target_selection(self._build_response(prompt, ""), valid_targets)
+
+    def prepare_target_selection(self, game_context: Dict, valid_targets: List[str]) -> str:
+        return prompts.selection_prompt(self.name, game_context, valid_targets)
+
+    def _generate_batch(self, prompts: List[str]) -> List[Dict]:
+        # A batch costs one simulated generation regardless of its size
+        self._simulate_generation(1)
+        return [self._build_response(prompt, "") for prompt in prompts]
+
+    def finish_target_selection(self, response_data: Dict, valid_targets: List[str]) -> Dict:
+        target = self.rng.choice(valid_targets)
+        response_data["raw_llm_output"] = f"{response_data['raw_llm_output']}{target}"
+        response_data["final_decision"] = target
+        return response_data
@@ -0,0 +1,102 @@
+from instrumentation import METRICS
+from typing import Dict, Tuple
+import threading
+import time
+
+try:
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+    import torch
+
+    DEFAULT_DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+except ImportError:
+    DEFAULT_DEVICE = "cpu"
+
+# (model_name, dtype, device, compiled)
+ModelKey = Tuple[str, str, str, bool]
+
+
+class ModelHandle:
+    """A loaded tokenizer/model pair shared by every backend that uses the same key."""
+
+    def __init__(self, key: ModelKey, tokenizer, model, load_seconds: float):
+        self.key = key
+        self.model_name, self.dtype, self.device, self.compiled = key
+        self.tokenizer = tokenizer
+        self.model = model
+        self.load_seconds = load_seconds
+        self.ref_count = 0
+        # Serializes inference on this model when several threads share it (see AsyncModerator)
+        self.lock = threading.Lock()
+        # Created by the first backend that enables prefix caching for this model
+        self.prefix_cache = None
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded models keyed by (model_name, dtype, device, compiled).
+
+    `dtype` is a torch dtype name ("float32", "bfloat16", ...) or "int8", which loads fp32
+    weights and applies dynamic int8 quantization to the nn.Linear layers (CPU only).
+
+    Backends call `acquire` to borrow a handle and `release` when they are done with it.
+    The weights are dropped once the last borrower releases its handle.
+    """
+
+    def __init__(self):
+        self._handles: Dict[ModelKey, ModelHandle] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, model_name: str, dtype: str = "float32", device: str = None, compile_model: bool = False) -> ModelHandle:
+        key = (model_name, dtype, device or DEFAULT_DEVICE, compile_model)
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is None:
+                handle = self._load(key)
+                self._handles[key] = handle
+            handle.ref_count += 1
+            return handle
+
+    def release(self, handle: ModelHandle):
+        with self._lock:
+            if self._handles.get(handle.key) is not handle:
+                return
+            handle.ref_count -= 1
+            if handle.ref_count <= 0:
+                del self._handles[handle.key]
+                print(f"[ModelRegistry] Unloaded model: {handle.model_name} ({handle.dtype}, {handle.device})")
+
+    def loaded_models(self) -> Dict[ModelKey, int]:
+        with self._lock:
+            return {key: handle.ref_count for key, handle in self._handles.items()}
+
+    def _load(self, key: ModelKey) -> ModelHandle:
+        model_name, dtype, device, compile_model = key
+        print(f"[ModelRegistry] Loading model: {model_name} ({dtype}) on {device}...")
+        start = time.perf_counter()
+
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        # Batched generation pads on the left so every prompt ends right before the new tokens
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        tokenizer.padding_side = "left"
+
+        if dtype == "int8":
+            if device != "cpu":
+                raise ValueError("int8 dynamic quantization is only supported on CPU.")
+            model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32)
+            # Note: GPT-2 style models use transformers' Conv1D rather than nn.Linear, so only
+            # their LM head is quantized; Llama/OPT/Mistral style models quantize every projection
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        else:
+            model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=getattr(torch, dtype)).to(device)
+        model.eval()
+
+        if compile_model:
+            model.forward = torch.compile(model.forward, dynamic=True)
+
+        load_seconds = time.perf_counter() - start
+        METRICS.record_model_load(model_name, load_seconds)
+        print(f"[ModelRegistry] Model loaded in {load_seconds:.1f}s.")
+        return ModelHandle(key, tokenizer, model, load_seconds)
+
+
+MODEL_REGISTRY = ModelRegistry()
@@ -0,0 +1,55 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+import threading
+
+
+def _past_nbytes(past_key_values) -> int:
+    if hasattr(past_key_values, "layers"):
+        tensors = [t for layer in past_key_values.layers for t in (layer.keys, layer.values) if t is not None]
+    elif hasattr(past_key_values, "key_cache"):
+        tensors = list(past_key_values.key_cache) + list(past_key_values.value_cache)
+    else:
+        tensors = [t for layer in past_key_values for t in layer]
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class PrefixCache:
+    """LRU cache of past key/values for prompt prefixes, bounded by a memory budget in bytes.
+
+    Entries are keyed by the exact prefix text and hold its token ids alongside the
+    key/values, so a later prompt only needs a forward pass over its new tokens.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, prefix: str) -> Optional[Tuple[object, object]]:
+        with self._lock:
+            entry = self._entries.get(prefix)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(prefix)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, prefix: str, input_ids, past_key_values):
+        nbytes = _past_nbytes(past_key_values)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if prefix in self._entries:
+                self.total_bytes -= self._entries.pop(prefix)[2]
+            self._entries[prefix] = (input_ids, past_key_values, nbytes)
+            self.total_bytes += nbytes
+            while self.total_bytes > self.max_bytes:
+                _, (_, _, evicted_bytes) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_bytes
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,43 @@
+from typing import Dict, List
+
+# Prompt templates shared by every backend that talks to (or imitates) a language model.
+# Kept free of heavy imports so mock and replay backends can rebuild the exact prompts.
+#
+# When the moderator runs with a token budget the context also carries the public transcript:
+# "transcript_earlier" (round summaries and finished rounds) only changes when a round ends or is
+# summarised, so it is part of the preamble that backends prefix-cache; "transcript_recent" (the
+# current round) follows it. Without a transcript the prompts are unchanged.
+
+
+def _earlier(context: Dict) -> str:
+    earlier = context.get("transcript_earlier")
+    return f"\nEarlier in the game:\n{earlier}\n" if earlier else ""
+
+
+def _recent(context: Dict) -> str:
+    recent = context.get("transcript_recent")
+    return f"\nThis round so far:\n{recent}\n" if recent else ""
+
+
+def discussion_preamble(name: str, context: Dict) -> str:
+    return f"You are playing the game Werewolf as a {context['role']} named {name}.{_earlier(context)}"
+
+
+def selection_preamble(name: str, context: Dict) -> str:
+    return f"You are a {context['role']} named {name}. You must select one person to eliminate.{_earlier(context)}"
+
+
+def discussion_prompt(name: str, context: Dict) -> str:
+    return f"{discussion_preamble(name, context)}{_recent(context)} The current status is: {context['status']}. Who do you suspect and what do you say to the group?"
+
+
+def selection_prompt(name: str, context: Dict, targets: List[str]) -> str:
+    return f"{selection_preamble(name, context)}{_recent(context)} The options are: {', '.join(targets)}. Based on the context: {context['status']}, who do you select? Respond ONLY with the name."
+
+
+def parse_target(text: str, valid_targets: List[str]) -> str:
+    """Returns the first valid target mentioned in `text`, falling back to the first target."""
+    for target in valid_targets:
+        if target.lower() in text.lower():
+            return target
+    return valid_targets[0]
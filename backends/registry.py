@@ -0,0 +1,41 @@
+from importlib import import_module
+from importlib.metadata import entry_points
+from typing import Dict, List, Type
+
+ENTRY_POINT_GROUP = "deceptivellms.backends"
+
+# Backends are referenced as "module:Class" strings so that heavy dependencies
+# (torch, transformers) are only imported when a seat of that kind is created
+_BUILTIN_BACKENDS: Dict[str, str] = {
+    "human": "backends.human_backend:HumanBackend",
+    "mock": "backends.mock_backend:MockBackend",
+    "hf": "backends.hf_llm_backend:LocalTransformerBackend",
+    "remote": "backends.remote_backend:RemoteTransformerBackend",
+}
+
+_registered: Dict[str, str] = dict(_BUILTIN_BACKENDS)
+
+
+def register_backend(kind: str, target: str):
+    """Registers a backend class by import path ("package.module:ClassName") without importing it."""
+    _registered[kind] = target
+
+
+def _plugin_backends() -> Dict[str, str]:
+    return {ep.name: ep.value for ep in entry_points(group=ENTRY_POINT_GROUP)}
+
+
+def available_backends() -> List[str]:
+    return sorted({**_plugin_backends(), **_registered})
+
+
+def get_backend_class(kind: str) -> Type:
+    target = _registered.get(kind) or _plugin_backends().get(kind)
+    if target is None:
+        raise ValueError(f"Unknown backend '{kind}'. Available backends: {', '.join(available_backends())}")
+    module_name, _, class_name = target.partition(":")
+    return getattr(import_module(module_name), class_name)
+
+
+def create_backend(kind: str, **kwargs):
+    return get_backend_class(kind)(**kwargs)
@@ -0,0 +1,66 @@
+from .backend import Backend
+from . import prompts
+from typing import Dict, List
+import json
+import urllib.error
+import urllib.request
+
+
+class RemoteTransformerBackend(Backend):
+    """Client for `backends.inference_server`; responses have the same shape as LocalTransformerBackend's.
+
+    The model lives in the server process, so seats (and worker processes) hold no weights.
+    Sampling happens server-side and is not reproducible from a game's seed.
+    """
+
+    def __init__(self, name: str, server_url: str = "http://127.0.0.1:8765", selection_mode: str = "generate", timeout: float = 600.0):
+        super().__init__(name)
+        if selection_mode not in ("generate", "score"):
+            raise ValueError(f"Unknown selection mode: {selection_mode}")
+        self.server_url = server_url.rstrip("/")
+        self.selection_mode = selection_mode
+        self.timeout = timeout
+
+    @property
+    def batch_key(self):
+        # Votes for the same server are sent as one request; the server may merge them with other games'
+        return None if self.selection_mode == "score" else self.server_url
+
+    def _post(self, path: str, payload: Dict) -> Dict:
+        request = urllib.request.Request(
+            self.server_url + path,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"Inference server error: {json.loads(e.read()).get('error', e.reason)}") from e
+        except urllib.error.URLError as e:
+            raise ConnectionError(f"Cannot reach inference server at {self.server_url}: {e.reason}") from e
+
+    def _generate_response(self, prompt: str, prefix: str = None, kind: str = "generate") -> Dict:
+        return self._post("/generate", {"prompts": [prompt], "prefix": prefix, "kind": kind})["responses"][0]
+
+    def _generate_batch(self, prompts: List[str]) -> List[Dict]:
+        return self._post("/generate", {"prompts": prompts, "kind": "selection"})["responses"]
+
+    def get_discussion_text(self, game_context: Dict) -> str:
+        prompt = prompts.discussion_prompt(self.name, game_context)
+        return self._generate_response(prompt, prefix=prompts.discussion_preamble(self.name, game_context), kind="discussion")
+
+    def get_target_selection(self, game_context: Dict, valid_targets: List[str]) -> str:
+        prompt = prompts.selection_prompt(self.name, game_context, valid_targets)
+        if self.selection_mode == "score":
+            return self._post("/score", {"prompt": prompt, "targets": valid_targets})
+
+        response_data = self._generate_response(prompt, prefix=prompts.selection_preamble(self.name, game_context), kind="selection")
+        return self.finish_target_selection(response_data, valid_targets)
+
+    def prepare_target_selection(self, game_context: Dict, valid_targets: List[str]) -> str:
+        return prompts.selection_prompt(self.name, game_context, valid_targets)
+
+    def finish_target_selection(self, response_data: Dict, valid_targets: List[str]) -> Dict:
+        response_data["final_decision"] = prompts.parse_target(response_data["final_decision"], valid_targets)
+        return response_data
@@ -0,0 +1,111 @@
+from .backend import Backend
+from . import prompts
+from collections import defaultdict, deque
+from typing import Callable, Dict, List, Tuple
+
+# Keys the moderator adds on top of a backend's response when it logs a decision
+_MODERATOR_KEYS = {"speaker", "role", "text", "voter", "target", "werewolves"}
+
+_DECISION_EVENTS = {
+    "DISCUSSION": ("discussion", lambda details: details.get("speaker")),
+    "VOTE": ("selection", lambda details: details.get("voter")),
+    "WW_TARGET": ("selection", lambda details: (details.get("werewolves") or [None])[0]),
+}
+
+
+class ReplayCache:
+    """Recorded backend responses from saved game logs.
+
+    LLM decisions are keyed by the exact prompt they were generated from; decisions without a
+    prompt (human seats) are keyed by (player, kind, phase, round). Repeated keys are served in
+    the order they were recorded.
+    """
+
+    def __init__(self):
+        self._by_prompt = defaultdict(deque)
+        self._by_seat = defaultdict(deque)
+        self.seat_sources = {}
+        self.hits = 0
+        self.misses = 0
+
+    def add_log(self, game_log: Dict):
+        for entry in game_log.get("log", []):
+            if entry["event_type"] not in _DECISION_EVENTS:
+                continue
+            kind, decider = _DECISION_EVENTS[entry["event_type"]]
+            details = entry["details"]
+            player = decider(details)
+            record = {k: v for k, v in details.items() if k not in _MODERATOR_KEYS}
+            self.seat_sources.setdefault(player, record.get("source", "LLM"))
+
+            if record.get("prompt_used"):
+                self._by_prompt[record["prompt_used"]].append(record)
+            else:
+                self._by_seat[(player, kind, entry["phase"], entry["round"])].append(record)
+
+    def lookup(self, prompt: str = None, seat_key: tuple = None) -> Dict:
+        queue = self._by_prompt.get(prompt) if prompt is not None else self._by_seat.get(seat_key)
+        if queue:
+            self.hits += 1
+            return dict(queue.popleft())
+        self.misses += 1
+        return None
+
+
+class ReplayBackend(Backend):
+    """Serves a seat's decisions from a ReplayCache and only calls a real backend on a cache miss.
+
+    `fallback_factory` builds the real backend (model or human) the first time it is needed, so a
+    fully cached replay never loads a model. LLM seats are looked up by the prompt they would send
+    today, so a prompt-template change shows up as misses rather than stale answers.
+
+    Prompts that include the transcript depend on how the recording backend counted tokens, so
+    `prompt_sizing` (see `load_prompt_sizing`) should match it; without it the base estimate is used.
+    """
+
+    def __init__(self, name: str, cache: ReplayCache, fallback_factory: Callable[[], Backend] = None, llm_seat: bool = True,
+                 prompt_sizing: Tuple[Callable[[str], int], int] = None):
+        super().__init__(name)
+        self.cache = cache
+        self.fallback_factory = fallback_factory
+        self.llm_seat = llm_seat
+        self._fallback = None
+        if prompt_sizing is not None:
+            self.count_tokens, self.max_prompt_tokens = prompt_sizing
+
+    def _lookup(self, kind: str, game_context: Dict, prompt: str) -> Dict:
+        if self.llm_seat:
+            return self.cache.lookup(prompt=prompt)
+        return self.cache.lookup(seat_key=(self.name, kind, game_context["game_state"], game_context["round_number"]))
+
+    def _get_fallback(self) -> Backend:
+        if self._fallback is None:
+            if self.fallback_factory is None:
+                raise KeyError(f"[{self.name}] No recorded response matches this decision and no fallback backend is set.")
+            print(f"[{self.name}] Replay cache miss, falling back to a live backend.")
+            self._fallback = self.fallback_factory()
+            self._fallback.metrics = self.metrics
+        return self._fallback
+
+    def get_discussion_text(self, game_context: Dict) -> str:
+        record = self._lookup("discussion", game_context, prompts.discussion_prompt(self.name, game_context))
+        if record is None:
+            return self._get_fallback().get_discussion_text(game_context)
+        record["replayed"] = True
+        return record
+
+    def get_target_selection(self, game_context: Dict, valid_targets: List[str]) -> str:
+        record = self._lookup("selection", game_context, prompts.selection_prompt(self.name, game_context, valid_targets))
+        if record is None:
+            return self._get_fallback().get_target_selection(game_context, valid_targets)
+
+        # The recorded decision is replayed as is, since not every backend's choice is parse_target of its raw output
+        if record["final_decision"] not in valid_targets:
+            return self._get_fallback().get_target_selection(game_context, valid_targets)
+        record["replayed"] = True
+        return record
+
+    def release(self):
+        if self._fallback is not None:
+            self._fallback.release()
+            self._fallback = None
@@ -0,0 +1,60 @@
+from typing import List
+import re
+
+try:
+    from transformers import StoppingCriteria
+    import torch
+except ImportError:
+    StoppingCriteria = object
+
+# A new "Name:" at the end of the text means the model has started writing someone else's turn
+_TURN_MARKER = re.compile(r"(^|\s)[A-Z][\w]*:\s*$")
+_SENTENCE_END = re.compile(r"[.!?](\s|$)")
+
+
+def strip_turn_marker(text: str) -> str:
+    """Removes a trailing "Name:" the model started before it was stopped."""
+    return _TURN_MARKER.sub("", text).rstrip()
+
+
+class TurnBoundaryCriteria(StoppingCriteria):
+    """Stops each sequence at the first sentence end, line break or new speaker turn it generates,
+    or once it starts copying the prompt back.
+
+    Only generated tokens are inspected, and each of them once, so the check stays cheap when
+    assisted decoding appends several tokens per step. A boundary inside the first `min_new_tokens`
+    is remembered, but the sequence only stops once it has that many tokens.
+    """
+
+    def __init__(self, tokenizer, prompt_ids: List[List[int]], min_new_tokens: int = 4, echo_ngram: int = 6):
+        self.tokenizer = tokenizer
+        self.prompt_length = len(prompt_ids[0])
+        self.min_new_tokens = min_new_tokens
+        self.echo_ngram = echo_ngram
+        self._prompt_ngrams = [
+            {tuple(ids[i:i + echo_ngram]) for i in range(len(ids) - echo_ngram + 1)}
+            for ids in prompt_ids
+        ]
+        self._checked = 0
+        self._boundary = None
+        self._done = None
+
+    def _finished(self, row: int, generated: List[int]) -> bool:
+        new_text = self.tokenizer.decode(generated[self._checked:], skip_special_tokens=True)
+        if "\n" in new_text or _SENTENCE_END.search(new_text):
+            return True
+        if _TURN_MARKER.search(self.tokenizer.decode(generated[-4:], skip_special_tokens=True)):
+            return True
+        return len(generated) >= self.echo_ngram and tuple(generated[-self.echo_ngram:]) in self._prompt_ngrams[row]
+
+    def __call__(self, input_ids, scores, **kwargs):
+        if self._done is None:
+            self._boundary = [False] * input_ids.shape[0]
+            self._done = [False] * input_ids.shape[0]
+        generated = input_ids[:, self.prompt_length:].tolist()
+        if len(generated[0]) > self._checked:
+            for row, tokens in enumerate(generated):
+                self._boundary[row] = self._boundary[row] or self._finished(row, tokens)
+                self._done[row] = self._boundary[row] and len(tokens) >= self.min_new_tokens
+            self._checked = len(generated[0])
+        return torch.tensor(self._done, dtype=torch.bool, device=input_ids.device)
@@ -0,0 +1,53 @@
+"""Guards CLI startup time: `python main.py --help` must stay fast and must not import torch/transformers.
+
+Run from the repository root: python -m benchmarks.bench_import_time --budget 0.5
+Exits with status 1 when the budget is exceeded or a heavy dependency is imported eagerly.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["torch", "transformers"]
+
+
+def time_command(args: list, repeats: int) -> float:
+    """Best-of-N wall time of a fresh interpreter running `args`, in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def eagerly_imported_modules() -> list:
+    check = f"import sys, main; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", check], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    return [m for m in output.stdout.strip().split(",") if m]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup time.")
+    parser.add_argument("--budget", type=float, default=0.5, help="Maximum seconds allowed for `main.py --help`.")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = time_command(["-c", "pass"], args.repeats)
+    help_time = time_command(["main.py", "--help"], args.repeats)
+    heavy = eagerly_imported_modules()
+
+    print(f"Interpreter startup: {baseline:.3f}s")
+    print(f"main.py --help:      {help_time:.3f}s (budget {args.budget:.3f}s)")
+    print(f"Heavy modules imported by `import main`: {heavy or 'none'}")
+
+    if heavy or help_time > args.budget:
+        print("FAIL: startup budget exceeded.")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Measures pure moderator overhead by playing full games with instant mock backends.
+
+Run from the repository root: python -m benchmarks.bench_moderator --players 8 50 200
+"""
+from game.moderator import Moderator
+from experiment import assign_roles_and_backends, seed_game
+from contextlib import redirect_stdout
+import argparse
+import os
+import time
+
+
+def bench_games(num_players: int, games: int, seed: int = 0) -> dict:
+    total_rounds = 0
+    elapsed = 0.0
+    for g in range(games):
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            seed_game(seed + g)
+            players = assign_roles_and_backends(num_players, 0, "", backend_kind="mock")
+            start = time.perf_counter()
+            game_instance = Moderator(players)
+            game_instance.start_game()
+            elapsed += time.perf_counter() - start
+        total_rounds += game_instance.round_number
+
+    return {
+        "players": num_players,
+        "games": games,
+        "games_per_sec": games / elapsed,
+        "ms_per_round": 1000 * elapsed / max(total_rounds, 1),
+        "ms_per_round_per_player": 1000 * elapsed / max(total_rounds, 1) / num_players,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark moderator overhead with mock backends.")
+    parser.add_argument("--players", type=int, nargs="+", default=[8, 25, 50, 100, 200])
+    parser.add_argument("--games", type=int, default=20)
+    args = parser.parse_args()
+
+    for num_players in args.players:
+        result = bench_games(num_players, args.games)
+        print(
+            f"{result['players']:>4} players: {result['games_per_sec']:8.1f} games/s, "
+            f"{result['ms_per_round']:8.3f} ms/round, {result['ms_per_round_per_player']:.4f} ms/round/player"
+        )
+
+
+if __name__ == "__main__":
+    main()
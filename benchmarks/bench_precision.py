@@ -0,0 +1,70 @@
+"""Compares LLM player throughput and memory across --precision modes.
+
+Run from the repository root: python -m benchmarks.bench_precision --model openai-community/gpt2
+Each mode runs in a fresh interpreter so its peak RSS is measured in isolation.
+"""
+from experiment import PRECISIONS
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_WORKER = """
+import json, resource, sys, time
+import torch
+from backends.hf_llm_backend import LocalTransformerBackend
+
+model_name, dtype, compile_model, decisions = sys.argv[1], sys.argv[2], sys.argv[3] == "1", int(sys.argv[4])
+backend = LocalTransformerBackend("Player_1", model_name=model_name, dtype=dtype, prefix_cache_mb=0, compile_model=compile_model)
+context = {"role": "Villager", "status": "Round 1 is starting."}
+backend.get_discussion_text(context)  # warm-up (and compilation, if enabled)
+
+generated_tokens = 0
+start = time.perf_counter()
+for _ in range(decisions):
+    prompt = backend._create_discussion_prompt(context)
+    prompt_tokens = len(backend.tokenizer(prompt).input_ids)
+    response = backend._generate_response(prompt)
+    generated_tokens += len(backend.tokenizer(response["raw_llm_output"]).input_ids) - prompt_tokens
+elapsed = time.perf_counter() - start
+
+print(json.dumps({
+    "load_seconds": backend.model_handle.load_seconds,
+    "tokens_per_sec": generated_tokens / elapsed,
+    "seconds_per_decision": elapsed / decisions,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+def bench_mode(model_name: str, dtype: str, compile_model: bool, decisions: int) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", _WORKER, model_name, dtype, "1" if compile_model else "0", str(decisions)],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tokens/sec and peak RSS per precision mode.")
+    parser.add_argument("--model", default="openai-community/gpt2")
+    parser.add_argument("--modes", nargs="+", choices=list(PRECISIONS), default=list(PRECISIONS))
+    parser.add_argument("--compile", action="store_true", help="Also benchmark each mode with torch.compile.")
+    parser.add_argument("--decisions", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'mode':<14}{'load s':>8}{'tok/s':>10}{'s/decision':>12}{'peak RSS MB':>13}")
+    for mode in args.modes:
+        for compile_model in ([False, True] if args.compile else [False]):
+            result = bench_mode(args.model, PRECISIONS[mode], compile_model, args.decisions)
+            label = mode + ("+compile" if compile_model else "")
+            print(
+                f"{label:<14}{result['load_seconds']:>8.2f}{result['tokens_per_sec']:>10.1f}"
+                f"{result['seconds_per_decision']:>12.3f}{result['peak_rss_mb']:>13.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""End-to-end benchmark suite with regression tracking.
+
+Run from the repository root:
+    python -m benchmarks.suite --model sshleifer/tiny-gpt2 --update-baseline   # record a baseline
+    python -m benchmarks.suite --model sshleifer/tiny-gpt2                     # compare against it
+
+Results are written as JSON. Every metric is compared against the stored baseline and the run
+fails (exit status 1) when any metric is worse than the baseline by more than --tolerance.
+Baselines are machine specific, so the check is local only: benchmarks/baseline.json is
+gitignored and each machine records its own with --update-baseline before tracking regressions.
+"""
+from game.moderator import Moderator
+from game.log_sink import JsonlLogSink
+from experiment import acquire_models, assign_roles_and_backends, release_models, seed_game
+from contextlib import contextmanager, redirect_stdout
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CONTEXT = {"role": "Villager", "status": "Round 1 is starting. Player Player_3 was eliminated in the previous phase."}
+TARGETS = ["Player_2", "Player_3", "Player_4", "Player_5"]
+
+
+@contextmanager
+def _quiet():
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        yield
+
+
+def _metric(value: float, unit: str, better: str = "lower") -> dict:
+    return {"value": value, "unit": unit, "better": better}
+
+
+def _median_seconds(func, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def play_games(num_players: int, games: int, backend_kind: str, model_name: str = "", seed: int = 0) -> list:
+    """Plays `games` seeded games and returns the finished moderators."""
+    moderators = []
+    with _quiet():
+        # Keep the model loaded between games, as the experiment runners do
+        handles = acquire_models({"backend": backend_kind, "model": model_name})
+        try:
+            for g in range(games):
+                seed_game(seed + g)
+                players = assign_roles_and_backends(num_players, 0, model_name, backend_kind=backend_kind)
+                game_instance = Moderator(players)
+                game_instance.start_game()
+                for p in players:
+                    p.backend.release()
+                moderators.append(game_instance)
+        finally:
+            release_models(handles)
+    return moderators
+
+
+def bench_model(model_name: str, repeats: int) -> dict:
+    from backends.model_registry import MODEL_REGISTRY
+    from backends import LocalTransformerBackend
+
+    def load_once():
+        with _quiet():
+            MODEL_REGISTRY.release(MODEL_REGISTRY.acquire(model_name))
+
+    results = {"model_load_seconds": _metric(_median_seconds(load_once, repeats), "s")}
+
+    with _quiet():
+        backend = LocalTransformerBackend("Player_1", model_name=model_name)
+        scoring = LocalTransformerBackend("Player_1", model_name=model_name, selection_mode="score")
+        backend.get_discussion_text(CONTEXT)  # warm-up
+
+    results["discussion_decision_seconds"] = _metric(_median_seconds(lambda: backend.get_discussion_text(CONTEXT), repeats), "s")
+    results["selection_decision_seconds"] = _metric(_median_seconds(lambda: backend.get_target_selection(CONTEXT, TARGETS), repeats), "s")
+    results["scored_selection_decision_seconds"] = _metric(_median_seconds(lambda: scoring.get_target_selection(CONTEXT, TARGETS), repeats), "s")
+    backend.release()
+    scoring.release()
+    return results
+
+
+def bench_full_games(player_counts: list, games: int, backend_kind: str, model_name: str = "") -> dict:
+    results = {}
+    for num_players in player_counts:
+        start = time.perf_counter()
+        play_games(num_players, games, backend_kind, model_name)
+        elapsed = time.perf_counter() - start
+        results[f"{backend_kind}_{num_players}p_game_seconds"] = _metric(elapsed / games, "s")
+        results[f"{backend_kind}_{num_players}p_games_per_sec"] = _metric(games / elapsed, "games/s", better="higher")
+    return results
+
+
+def bench_save_log(num_players: int, repeats: int) -> dict:
+    # A long game's worth of events, made by concatenating the logs of several mock games
+    moderators = play_games(num_players, 10, "mock")
+    game_instance = moderators[0]
+    for other in moderators[1:]:
+        game_instance.log_sink.entries.extend(other.log_sink.entries)
+    entries = game_instance.game_log
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_path = os.path.join(tmp_dir, "game.json")
+        jsonl_path = os.path.join(tmp_dir, "game.jsonl")
+
+        def save_json():
+            with _quiet():
+                game_instance.save_log(json_path)
+
+        def stream_jsonl():
+            sink = JsonlLogSink(jsonl_path)
+            for entry in entries:
+                sink.write(entry)
+            sink.finalize({"rounds_played": game_instance.round_number}, jsonl_path)
+
+        return {
+            "save_log_json_seconds": _metric(_median_seconds(save_json, repeats), "s"),
+            "save_log_jsonl_seconds": _metric(_median_seconds(stream_jsonl, repeats), "s"),
+            "save_log_events": _metric(len(entries), "events", better="info"),
+        }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Returns a list of human-readable regressions, printing a comparison table as it goes."""
+    regressions = []
+    print(f"\n{'metric':<40}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, current in results["metrics"].items():
+        base = baseline["metrics"].get(name)
+        if base is None or current["better"] == "info" or not base["value"]:
+            print(f"{name:<40}{'-':>12}{current['value']:>12.4g}{'new':>10}")
+            continue
+        change = current["value"] / base["value"] - 1
+        worse = change > tolerance if current["better"] == "lower" else change < -tolerance
+        flag = "  REGRESSION" if worse else ""
+        print(f"{name:<40}{base['value']:>12.4g}{current['value']:>12.4g}{change:>+10.1%}{flag}")
+        if worse:
+            regressions.append(f"{name}: {base['value']:.4g} -> {current['value']:.4g} {current['unit']} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the end-to-end benchmark suite and compare against a baseline.")
+    parser.add_argument("--model", default="sshleifer/tiny-gpt2", help="Small causal LM used for the model benchmarks.")
+    parser.add_argument("--skip-model", action="store_true", help="Only run the benchmarks that need no model.")
+    parser.add_argument("--players", type=int, nargs="+", default=[6, 12, 24])
+    parser.add_argument("--games", type=int, default=5, help="Games per player count with the model backend.")
+    parser.add_argument("--mock-games", type=int, default=50, help="Games per player count with the mock backend.")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results", "latest.json"))
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline.json"))
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown before failing.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline.")
+    args = parser.parse_args()
+
+    metrics = {}
+    metrics.update(bench_full_games(args.players, args.mock_games, "mock"))
+    metrics.update(bench_save_log(12, args.repeats))
+    if not args.skip_model:
+        metrics.update(bench_model(args.model, args.repeats))
+        metrics.update(bench_full_games(args.players, args.games, "hf", args.model))
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {"python": sys.version.split()[0], "platform": platform.platform(), "model": None if args.skip_model else args.model},
+        "metrics": metrics,
+    }
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=4)
+    print(f"Saved benchmark results to: {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=4)
+        print(f"Updated baseline: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one.")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nFAIL: performance regressions detected:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("\nOK: no regressions beyond tolerance.")
+
+
+if __name__ == "__main__":
+    main()
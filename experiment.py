@@ -0,0 +1,376 @@
+from game.moderator import Moderator
+from game.async_moderator import AsyncModerator
+from game.log_sink import JsonlLogSink, MemoryLogSink, load_game_log
+from game.checkpoint import read_checkpoint
+from game.agent import Player, Villager, Werewolf
+from backends import create_backend
+from backends.replay_backend import ReplayBackend, ReplayCache
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+import asyncio
+import glob
+import json
+import random
+import os
+import shutil
+import sys
+import time
+from typing import Dict, Iterator, List
+
+# --precision values mapped to the dtype names understood by the model registry
+PRECISIONS = {"fp32": "float32", "bf16": "bfloat16", "int8": "int8"}
+
+ROLE_CLASSES = {"Werewolf": Werewolf, "Villager": Villager}
+
+MANIFEST_NAME = "manifest.jsonl"
+
+
+def num_werewolves_for(num_players: int, werewolf_ratio: float = None) -> int:
+    """One werewolf per four players by default; a ratio is rounded and kept below a majority."""
+    if werewolf_ratio is None:
+        return max(1, num_players // 4)
+    return min(max(1, round(num_players * werewolf_ratio)), (num_players - 1) // 2)
+
+
+def assign_roles_and_backends(num_players: int, num_human: int, model_name: str, backend_kind: str = "hf", backend_options: Dict = None,
+                              roles: List[str] = None, werewolf_ratio: float = None) -> List[Player]:
+    # A comma separated list of models is assigned round-robin across the LLM seats
+    model_names = [m.strip() for m in model_name.split(",") if m.strip()]
+    if num_human > num_players:
+        raise ValueError("Number of human players cannot exceed total number of players.")
+
+    player_names = [f"Player_{i+1}" for i in range(num_players)]
+    
+    if roles is not None:
+        # Seats restored from a checkpoint keep their roles
+        roles = [ROLE_CLASSES[role] for role in roles]
+    else:
+        num_werewolves = num_werewolves_for(num_players, werewolf_ratio)
+        roles = ([Werewolf] * num_werewolves) + ([Villager] * (num_players - num_werewolves))
+        random.shuffle(roles)
+    
+    player_configs = []
+    for i, name in enumerate(player_names):
+        role_class = roles[i]
+        
+        if i < num_human:
+            backend = create_backend("human", name=name)
+            print(f"Setting up Human player: {name} as {role_class.__name__}")
+        else:
+            if backend_kind == "hf":
+                seat_model = model_names[(i - num_human) % len(model_names)]
+                backend = create_backend("hf", name=name, model_name=seat_model, **(backend_options or {}))
+                print(f"Setting up LLM player: {name} as {role_class.__name__} with model {seat_model}")
+            else:
+                backend = create_backend(backend_kind, name=name, **(backend_options or {}))
+                print(f"Setting up {backend_kind} player: {name} as {role_class.__name__}")
+            
+        player_configs.append(role_class(name, backend))
+        
+    return player_configs
+
+
+def hf_backend_options(config: Dict) -> Dict:
+    """Keyword arguments for LocalTransformerBackend derived from the experiment config."""
+    return {
+        "dtype": PRECISIONS[config.get("precision", "fp32")],
+        "compile_model": config.get("compile", False),
+        "selection_mode": config.get("selection", "generate"),
+        "draft_model": config.get("draft_model"),
+        "fast_decoding": config.get("fast_decoding", False),
+        "token_budgets": {
+            phase: config[f"{phase}_tokens"] for phase in ("discussion", "selection") if config.get(f"{phase}_tokens")
+        },
+    }
+
+
+def backend_options(config: Dict) -> Dict:
+    """Keyword arguments for the configured backend kind."""
+    kind = config.get("backend", "hf")
+    if kind == "hf":
+        return hf_backend_options(config)
+    if kind == "remote":
+        return {"server_url": config["server"], "selection_mode": config.get("selection", "generate")}
+    return {}
+
+
+def seed_game(seed: int):
+    """Seeds every RNG a game draws from so each run is reproducible from its seed."""
+    random.seed(seed)
+    if "torch" in sys.modules:
+        sys.modules["torch"].manual_seed(seed)
+
+
+def _checkpoint_config(config: Dict) -> Dict:
+    # Compared after a JSON round trip, since that is how the checkpoint stores it
+    return json.loads(json.dumps({k: v for k, v in config.items() if k != "resume"}))
+
+
+def _discard_checkpoint(checkpoint_path: str, state: Dict):
+    log_path = state["log"].get("journal") or state["log"].get("path")
+    for path in (checkpoint_path, log_path):
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+def run_single_game(config: Dict, run_index: int, seed: int, output_dir: str = None) -> Dict:
+    """Plays one game with fresh role assignments and returns a small result record.
+
+    When logs are saved, the game is checkpointed at every phase boundary; with `config["resume"]`
+    an existing checkpoint for this run is continued instead of starting over, provided it was
+    written for the same seed and configuration.
+    """
+    start = time.perf_counter()
+    checkpoint_path = None
+    state = None
+    if output_dir is not None:
+        os.makedirs(os.path.join(output_dir, "checkpoints"), exist_ok=True)
+        checkpoint_path = os.path.join(output_dir, "checkpoints", f"run{run_index + 1}.json")
+        if config.get("resume") and os.path.exists(checkpoint_path):
+            state = read_checkpoint(checkpoint_path)
+            if state["extra"].get("seed") != seed or state["extra"].get("config") != _checkpoint_config(config):
+                print(f"Discarding the run {run_index + 1} checkpoint: it belongs to a different seed or configuration.")
+                _discard_checkpoint(checkpoint_path, state)
+                state = None
+
+    if state is None:
+        seed_game(seed)
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+    else:
+        timestamp = state["extra"]["timestamp"]
+        print(f"Resuming run {run_index + 1} from its round {state['round_number']} checkpoint.")
+
+    roles = [p["role"] for p in state["players"]] if state else None
+    players = assign_roles_and_backends(config["players"], config["human"], config["model"], config.get("backend", "hf"), backend_options(config), roles,
+                                        config.get("werewolf_ratio"))
+    if state is not None and "journal" in state["log"]:
+        log_sink = MemoryLogSink.from_checkpoint(state["log"])
+    elif state is not None:
+        log_sink = JsonlLogSink(state["log"]["path"], resume_offset=state["log"]["offset"])
+    elif output_dir is not None and config.get("log_format") == "jsonl":
+        # Events stream to a partial file that is renamed once the outcome is known
+        partial_path = os.path.join(output_dir, f"game_{timestamp}_run{run_index + 1}.partial")
+        log_sink = JsonlLogSink(partial_path, compression=config.get("log_compression"))
+    elif output_dir is not None:
+        log_sink = MemoryLogSink(os.path.join(output_dir, "checkpoints", f"run{run_index + 1}.events.jsonl"))
+    else:
+        log_sink = MemoryLogSink()
+
+    try:
+        moderator_options = {
+            "log_sink": log_sink,
+            "checkpoint_path": checkpoint_path,
+            "checkpoint_extra": {"run": run_index, "seed": seed, "timestamp": timestamp, "config": _checkpoint_config(config)},
+            "context_tokens": config.get("context_tokens", 0),
+        }
+        if config.get("async"):
+            game_instance = AsyncModerator(players, concurrent_discussion=config.get("concurrent_discussion", False), **moderator_options)
+        else:
+            game_instance = Moderator(players, **moderator_options)
+        if state is not None:
+            game_instance.restore_state(state)
+
+        if config.get("async"):
+            asyncio.run(game_instance.start_game())
+        else:
+            game_instance.start_game()
+        winner = game_instance.check_win_condition()
+
+        file_path = None
+        if output_dir is not None:
+            filename = f"game_{timestamp}_run{run_index + 1}_r{game_instance.round_number}_{winner}_{config['players']}p{log_sink.extension}"
+            file_path = os.path.join(output_dir, filename)
+            game_instance.save_log(file_path)
+            if os.path.exists(checkpoint_path):
+                os.remove(checkpoint_path)
+    finally:
+        for p in players:
+            p.backend.release()
+
+    return {
+        "run": run_index,
+        "seed": seed,
+        "winner": winner,
+        "rounds": game_instance.round_number,
+        "log_file": file_path,
+        "wall_seconds": time.perf_counter() - start,
+        "metrics": game_instance.metrics.samples(),
+    }
+
+
+def start_manifest(output_dir: str, config: Dict, runs: int, base_seed: int):
+    """Starts a new experiment in `output_dir`, clearing checkpoints and partial logs left by an earlier one."""
+    shutil.rmtree(os.path.join(output_dir, "checkpoints"), ignore_errors=True)
+    for path in glob.glob(os.path.join(output_dir, "*.partial")):
+        os.remove(path)
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w') as f:
+        f.write(json.dumps({"config": config, "runs": runs, "base_seed": base_seed}) + "\n")
+
+
+def append_manifest(output_dir: str, result: Dict):
+    record = {k: v for k, v in result.items() if k != "metrics"}
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'a') as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def read_manifest(output_dir: str):
+    """Returns (header, completed run records) of the experiment in `output_dir`, or (None, []) if there is none."""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None, []
+    with open(path) as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    return lines[0], lines[1:]
+
+
+def find_replay_logs(paths: List[str]) -> List[str]:
+    """Expands directories into the game logs they contain."""
+    logs = []
+    for path in paths:
+        if os.path.isdir(path):
+            logs.extend(sorted(p for p in glob.glob(os.path.join(path, "game_*")) if not p.endswith(".partial")))
+        else:
+            logs.append(path)
+    return logs
+
+
+def replay_prompt_sizing(config: Dict):
+    """How the recording's LLM seats sized their transcript windows, or None when the base estimate applies.
+
+    Only the hf backend counts with a real tokenizer; it is loaded once for a whole replay, without weights.
+    """
+    if not config.get("context_tokens") or config.get("backend", "hf") != "hf":
+        return None
+    from backends.hf_llm_backend import load_prompt_sizing
+    return load_prompt_sizing(config["model"].split(",")[0].strip(), hf_backend_options(config)["token_budgets"])
+
+
+def run_replay_game(config: Dict, log_path: str, output_dir: str = None, prompt_sizing=None, held_models: list = None) -> Dict:
+    """Re-drives the moderator through a saved game, serving recorded decisions from a prompt-keyed cache.
+
+    Seats keep their recorded roles. Only decisions whose prompt no longer matches a recording
+    (e.g. after a template change) reach a live backend. With `held_models`, the first live model
+    seat fills it with `acquire_models` handles, so later games reuse the loaded weights; the
+    caller releases them once every game has been replayed.
+    """
+    start = time.perf_counter()
+    saved = load_game_log(log_path)
+    cache = ReplayCache()
+    cache.add_log(saved)
+
+    def fallback_factory(name: str, llm_seat: bool):
+        if not llm_seat:
+            return lambda: create_backend("human", name=name)
+        if config.get("backend", "hf") == "hf":
+            def create_hf():
+                if held_models is not None and not held_models:
+                    held_models.extend(acquire_models(config))
+                return create_backend("hf", name=name, model_name=config["model"].split(",")[0].strip(), **hf_backend_options(config))
+            return create_hf
+        return lambda: create_backend(config["backend"], name=name, **backend_options(config))
+
+    players = []
+    for name, info in saved["players"].items():
+        llm_seat = cache.seat_sources.get(name, "LLM") != "Human"
+        backend = ReplayBackend(name, cache, fallback_factory(name, llm_seat), llm_seat=llm_seat,
+                                prompt_sizing=prompt_sizing if llm_seat else None)
+        players.append(ROLE_CLASSES[info["role"]](name, backend))
+
+    try:
+        game_instance = Moderator(players, context_tokens=config.get("context_tokens", 0))
+        game_instance.start_game()
+        winner = game_instance.check_win_condition()
+
+        file_path = None
+        if output_dir is not None:
+            source_name = os.path.basename(log_path).split(".")[0]
+            file_path = os.path.join(output_dir, f"replay_{source_name}_r{game_instance.round_number}_{winner}.json")
+            game_instance.save_log(file_path)
+    finally:
+        for p in players:
+            p.backend.release()
+
+    return {
+        "source_log": log_path,
+        "winner": winner,
+        "original_winner": saved.get("winner"),
+        "rounds": game_instance.round_number,
+        "cache_hits": cache.hits,
+        "cache_misses": cache.misses,
+        "log_file": file_path,
+        "wall_seconds": time.perf_counter() - start,
+        "metrics": game_instance.metrics.samples(),
+    }
+
+
+def acquire_models(config: Dict) -> list:
+    """Loads every model the config's games use and returns the handles keeping them loaded.
+
+    Each game's backends release their own references when it ends; holding these across a
+    series of games stops the registry from unloading and reloading the weights between them.
+    """
+    if config.get("backend", "hf") != "hf":
+        return []
+    from backends.model_registry import MODEL_REGISTRY
+    options = hf_backend_options(config)
+    handles = [
+        MODEL_REGISTRY.acquire(model_name, dtype=options["dtype"], compile_model=options["compile_model"])
+        for model_name in {m.strip() for m in config["model"].split(",") if m.strip()}
+    ]
+    if options["draft_model"]:
+        handles.append(MODEL_REGISTRY.acquire(options["draft_model"], dtype=options["dtype"]))
+    return handles
+
+
+def release_models(handles: list):
+    if not handles:
+        return
+    from backends.model_registry import MODEL_REGISTRY
+    for handle in handles:
+        MODEL_REGISTRY.release(handle)
+
+
+def run_games_sequential(config: Dict, runs: int, base_seed: int, output_dir: str = None, pending: List[int] = None) -> Iterator[Dict]:
+    handles = acquire_models(config)
+    try:
+        for i in (range(runs) if pending is None else pending):
+            print(f"\n[Experiment Run {i + 1}/{runs}]")
+            yield run_single_game(config, i, base_seed + i, output_dir)
+    finally:
+        release_models(handles)
+
+
+# Model handles held for the lifetime of a worker process, so every game it plays reuses one load
+_WORKER_HANDLES = []
+
+
+def init_worker(config: Dict, threads_per_worker: int):
+    if config.get("backend", "hf") != "hf":
+        return
+    # Split the cores between workers instead of letting every process spawn a thread per core
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+    _WORKER_HANDLES.extend(acquire_models(config))
+
+
+def run_quiet_game(config: Dict, run_index: int, seed: int, output_dir: str = None) -> Dict:
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        return run_single_game(config, run_index, seed, output_dir)
+
+
+def run_games_parallel(config: Dict, runs: int, workers: int, base_seed: int, output_dir: str = None, pending: List[int] = None) -> Iterator[Dict]:
+    """Plays `runs` games across a process pool, yielding each result as soon as its game finishes."""
+    if config["human"] > 0:
+        raise ValueError("Parallel runs require all-LLM games (--human 0).")
+
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(config, threads_per_worker)) as pool:
+        futures = [
+            pool.submit(run_quiet_game, config, i, base_seed + i, output_dir)
+            for i in (range(runs) if pending is None else pending)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
@@ -40,6 +40,12 @@ class Player:
     
     def get_night_target(self, game_context: Dict, valid_targets: List[str]) -> str:
         return self.backend.get_target_selection(game_context, valid_targets)
+
+    async def aget_day_discussion(self, game_context: Dict) -> str:
+        return await self.backend.aget_discussion_text(game_context)
+
+    async def aget_night_target(self, game_context: Dict, valid_targets: List[str]) -> str:
+        return await self.backend.aget_target_selection(game_context, valid_targets)
     
 class Villager(Player):
     def __init__(self, name, backend: Backend):
@@ -0,0 +1,87 @@
+from .moderator import Moderator
+from .agent import Player
+import asyncio
+
+
+class AsyncModerator(Moderator):
+    """Moderator whose phases await backend calls so independent decisions run concurrently.
+
+    Every vote is requested at once: seats that share a model are still generated as one batch
+    (in a worker thread) while other seats, including humans, are asked in parallel. With
+    `concurrent_discussion`, each speaker's statement is also prepared concurrently before the
+    discussion is replayed. Results are always applied and logged in seat order, so the game
+    log is identical in structure and ordering to the synchronous Moderator's.
+    """
+
+    def __init__(self, players: list[Player], concurrent_discussion: bool = False, **kwargs):
+        super().__init__(players, **kwargs)
+        self.concurrent_discussion = concurrent_discussion
+
+    async def start_game(self):
+        self._begin_game()
+        
+        while self.game_state != "ENDED":
+            if self._next_phase == "NIGHT":
+                self._start_round()
+                with self.metrics.timed("phases", "NIGHT"):
+                    await self.night_phase()
+            else:
+                with self.metrics.timed("phases", "DAY"):
+                    await self.day_phase()
+            self._end_phase()
+        
+        print(f"\n*** GAME OVER! The {self.check_win_condition()} win! ***")
+
+    async def night_phase(self):
+        werewolves, valid_targets = self._start_night()
+        if werewolves and not valid_targets:
+            return
+
+        target_name = None
+        if werewolves:
+            ww_context = self._create_game_context(werewolves[0])
+            with self.metrics.timed("decisions", "night_target"):
+                decision_data = await werewolves[0].aget_night_target(ww_context, valid_targets)
+            target_name = self._record_night_target(werewolves, decision_data)
+
+        self._resolve_night(target_name)
+
+    async def day_phase(self):
+        alive_players = self._start_day()
+        if not alive_players:
+            return
+
+        print("--- Public Discussion Starts ---")
+        if self.concurrent_discussion:
+            contexts = [self._create_game_context(player) for player in alive_players]
+            with self.metrics.timed("decisions", "discussion_round"):
+                statements = await asyncio.gather(*(p.aget_day_discussion(c) for p, c in zip(alive_players, contexts)))
+            for player, discussion_data in zip(alive_players, statements):
+                self._record_discussion(player, discussion_data)
+        else:
+            for player in alive_players:
+                p_context = self._create_game_context(player)
+                with self.metrics.timed("decisions", "discussion"):
+                    discussion_data = await player.aget_day_discussion(p_context)
+                self._record_discussion(player, discussion_data)
+        print("--- Public Discussion Ends ---")
+
+        vote_jobs = self._start_voting(alive_players)
+        with self.metrics.timed("decisions", "votes"):
+            vote_results = await self._run_vote_jobs(vote_jobs)
+        self._resolve_votes(alive_players, vote_results)
+
+    async def _run_vote_jobs(self, vote_jobs: list) -> list:
+        batched = [i for i, job in enumerate(vote_jobs) if job[0].batch_key is not None]
+        unbatched = [i for i, job in enumerate(vote_jobs) if job[0].batch_key is None]
+
+        batch_task = asyncio.to_thread(self.generation_engine.run_target_selections, [vote_jobs[i] for i in batched])
+        single_tasks = [vote_jobs[i][0].aget_target_selection(vote_jobs[i][1], vote_jobs[i][2]) for i in unbatched]
+        batch_results, *single_results = await asyncio.gather(batch_task, *single_tasks)
+
+        results = [None] * len(vote_jobs)
+        for i, result in zip(batched, batch_results):
+            results[i] = result
+        for i, result in zip(unbatched, single_results):
+            results[i] = result
+        return results
@@ -0,0 +1,39 @@
+import base64
+import json
+import os
+import random
+import sys
+
+
+def capture_rng_state() -> dict:
+    """Snapshot of the global RNGs a game draws from (Python's, and torch's once it is loaded)."""
+    version, internal, gauss_next = random.getstate()
+    state = {"python": [version, list(internal), gauss_next]}
+    if "torch" in sys.modules:
+        torch_state = sys.modules["torch"].get_rng_state().numpy().tobytes()
+        state["torch"] = base64.b64encode(torch_state).decode("ascii")
+    return state
+
+
+def restore_rng_state(state: dict):
+    version, internal, gauss_next = state["python"]
+    random.setstate((version, tuple(internal), gauss_next))
+    if "torch" in state and "torch" in sys.modules:
+        torch = sys.modules["torch"]
+        torch_state = bytearray(base64.b64decode(state["torch"]))
+        torch.set_rng_state(torch.frombuffer(torch_state, dtype=torch.uint8))
+
+
+def write_checkpoint(path: str, state: dict):
+    """Writes a checkpoint atomically, so a crash mid-write leaves the previous checkpoint intact."""
+    tmp_path = path + ".tmp"
+    # json.dumps uses the C encoder; json.dump to a file streams through the much slower Python one
+    encoded = json.dumps(state, separators=(",", ":"))
+    with open(tmp_path, 'w') as f:
+        f.write(encoded)
+    os.replace(tmp_path, path)
+
+
+def read_checkpoint(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
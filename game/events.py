@@ -0,0 +1,142 @@
+from typing import Dict, Iterable, Iterator, List, Tuple
+import sys
+
+# Long free-text fields; each distinct value is stored once in the log's string table
+TABLE_FIELDS = frozenset({"prompt_used", "raw_llm_output", "final_decision", "text"})
+
+
+class StringTable:
+    """Deduplicated strings referenced by integer id."""
+
+    __slots__ = ("strings", "_ids")
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def add(self, value: str) -> int:
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(value)
+            self._ids[value] = string_id
+        return string_id
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class TextRef:
+    """A table string, optionally stored as the event's prompt followed by a suffix.
+
+    Causal LMs echo their prompt, so `raw_llm_output` and `final_decision` usually start with
+    `prompt_used`; storing only the suffix keeps one copy of the prompt per event.
+    """
+
+    __slots__ = ("prefix_id", "string_id")
+
+    def __init__(self, prefix_id: int, string_id: int):
+        self.prefix_id = prefix_id
+        self.string_id = string_id
+
+
+class Event:
+    """One moderator log entry.
+
+    Detail keys live in a `shape` tuple shared by every event with the same keys in the same order;
+    `values` holds the matching values, with TABLE_FIELDS as TextRefs and short strings interned.
+    """
+
+    __slots__ = ("round", "phase", "event_type", "timestamp", "shape", "values")
+
+    def __init__(self, round_number: int, phase: str, event_type: str, timestamp: float, shape: Tuple[str, ...], values: tuple):
+        self.round = round_number
+        self.phase = phase
+        self.event_type = event_type
+        self.timestamp = timestamp
+        self.shape = shape
+        self.values = values
+
+
+def _intern(value):
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return [sys.intern(v) if isinstance(v, str) else v for v in value]
+    if isinstance(value, dict):
+        return {sys.intern(k) if isinstance(k, str) else k: v for k, v in value.items()}
+    return value
+
+
+class EventLog:
+    """Append-only event list that stores entries compactly and reads them back as the original dicts.
+
+    Dicts are only rebuilt when entries are read, i.e. when a log is saved or checkpointed.
+    """
+
+    def __init__(self, entries: Iterable[Dict] = ()):
+        self.events: List[Event] = []
+        self.strings = StringTable()
+        self._shapes: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self.extend(entries)
+
+    def _text_ref(self, value: str, prompt: str, prompt_id: int) -> TextRef:
+        if prompt_id is not None and len(value) > len(prompt) and value.startswith(prompt):
+            return TextRef(prompt_id, self.strings.add(value[len(prompt):]))
+        return TextRef(None, self.strings.add(value))
+
+    def append(self, entry: Dict):
+        details = entry["details"]
+        prompt = details.get("prompt_used")
+        prompt_id = self.strings.add(prompt) if isinstance(prompt, str) else None
+
+        values = []
+        for key, value in details.items():
+            if key in TABLE_FIELDS and isinstance(value, str):
+                value = TextRef(None, prompt_id) if key == "prompt_used" else self._text_ref(value, prompt, prompt_id)
+            else:
+                value = _intern(value)
+            values.append(value)
+
+        keys = tuple(details)
+        shape = self._shapes.setdefault(keys, tuple(sys.intern(k) for k in keys))
+        self.events.append(Event(entry["round"], sys.intern(entry["phase"]), sys.intern(entry["event_type"]), entry["timestamp"], shape, tuple(values)))
+
+    def extend(self, entries: Iterable[Dict]):
+        for entry in entries:
+            self.append(entry)
+
+    def _text(self, ref: TextRef) -> str:
+        strings = self.strings.strings
+        if ref.prefix_id is None:
+            return strings[ref.string_id]
+        return strings[ref.prefix_id] + strings[ref.string_id]
+
+    def _to_dict(self, event: Event) -> Dict:
+        return {
+            "round": event.round,
+            "phase": event.phase,
+            "event_type": event.event_type,
+            "timestamp": event.timestamp,
+            "details": {
+                key: self._text(value) if isinstance(value, TextRef) else value
+                for key, value in zip(event.shape, event.values)
+            },
+        }
+
+    def __len__(self):
+        return len(self.events)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._to_dict(event) for event in self.events[index]]
+        return self._to_dict(self.events[index])
+
+    def __iter__(self) -> Iterator[Dict]:
+        return (self._to_dict(event) for event in self.events)
+
+    def __bool__(self):
+        return bool(self.events)
+
+    def to_dicts(self) -> List[Dict]:
+        return [self._to_dict(event) for event in self.events]
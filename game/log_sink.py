@@ -0,0 +1,183 @@
+from .events import EventLog
+import gzip
+import io
+import json
+import os
+
+
+def _open_text_stream(path: str, mode: str, compression: str = None):
+    if compression is None:
+        return open(path, mode, encoding="utf-8")
+    if compression == "gzip":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstd log compression requires the 'zstandard' package.")
+        if mode in ("w", "a"):
+            raw = zstandard.ZstdCompressor().stream_writer(open(path, mode + "b"), closefd=True)
+        else:
+            raw = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(raw, encoding="utf-8")
+    raise ValueError(f"Unknown log compression: {compression}")
+
+
+COMPRESSION_EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+class LogSink:
+    """Destination for the moderator's structured game events."""
+
+    extension = ".json"
+
+    def write(self, entry: dict):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def finalize(self, summary: dict, file_path: str):
+        """Writes the end-of-game summary and makes the finished log available at `file_path`."""
+        raise NotImplementedError
+
+    def checkpoint(self) -> dict:
+        """State needed to continue this log after a crash, or None if the sink cannot be resumed.
+
+        Called at every phase boundary, so it must only cost as much as the events since the last call.
+        """
+        return None
+
+    def read_entries(self):
+        """The events written so far, e.g. to rebuild derived state when a game is resumed."""
+        return iter(())
+
+
+class MemoryLogSink(LogSink):
+    """Keeps every event in memory and writes a single pretty-printed JSON file at the end.
+
+    Events are held in a compact EventLog; reading `entries` still yields the original dicts.
+    With a `journal_path`, each checkpoint appends the events added since the previous one to that
+    JSON Lines file, and the journal is removed once the final log is written.
+    """
+
+    def __init__(self, journal_path: str = None, resume_offset: int = None):
+        self.entries = EventLog()
+        self.journal_path = journal_path
+        self._journal = None
+        self._journaled = 0
+        if journal_path is not None and resume_offset is not None:
+            # Drop anything journaled after the checkpoint, reload the rest and keep appending
+            with open(journal_path, "r+b") as f:
+                f.truncate(resume_offset)
+            with open(journal_path, encoding="utf-8") as f:
+                self.entries.extend(json.loads(line) for line in f if line.strip())
+            self._journaled = len(self.entries)
+            self._journal = open(journal_path, "a", encoding="utf-8")
+        elif journal_path is not None:
+            self._journal = open(journal_path, "w", encoding="utf-8")
+
+    def write(self, entry: dict):
+        self.entries.append(entry)
+
+    def finalize(self, summary: dict, file_path: str):
+        with open(file_path, 'w') as f:
+            json.dump({**summary, "log": self.entries.to_dicts()}, f, indent=4)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+            os.remove(self.journal_path)
+
+    def checkpoint(self) -> dict:
+        if self._journal is None:
+            return None
+        for entry in self.entries[self._journaled:]:
+            self._journal.write(json.dumps(entry) + "\n")
+        self._journaled = len(self.entries)
+        self._journal.flush()
+        return {"journal": self.journal_path, "offset": self._journal.tell()}
+
+    @classmethod
+    def from_checkpoint(cls, state: dict) -> "MemoryLogSink":
+        return cls(state["journal"], resume_offset=state["offset"])
+
+    def read_entries(self):
+        return iter(self.entries)
+
+
+class JsonlLogSink(LogSink):
+    """Streams events to disk as JSON Lines while the game is played.
+
+    Each event is one line; the final line is `{"summary": {...}}` written by `finalize`.
+    Nothing is kept in memory, and a crashed game still leaves every flushed event on disk.
+    """
+
+    def __init__(self, path: str, compression: str = None, resume_offset: int = None):
+        self.path = path
+        self.compression = compression
+        self.extension = ".jsonl" + COMPRESSION_EXTENSIONS[compression]
+        if resume_offset is not None:
+            # Drop anything written after the checkpoint, then keep appending
+            with open(path, "r+b") as f:
+                f.truncate(resume_offset)
+            self._stream = _open_text_stream(path, "a", compression)
+        else:
+            self._stream = _open_text_stream(path, "w", compression)
+
+    def write(self, entry: dict):
+        self._stream.write(json.dumps(entry) + "\n")
+
+    def flush(self):
+        self._stream.flush()
+
+    def checkpoint(self) -> dict:
+        # A compressed stream cannot be cut at an arbitrary byte and appended to again
+        if self.compression is not None:
+            return None
+        self._stream.flush()
+        return {"path": self.path, "offset": self._stream.tell()}
+
+    def read_entries(self):
+        if self.compression is not None:
+            return super().read_entries()
+        self._stream.flush()
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def finalize(self, summary: dict, file_path: str):
+        self._stream.write(json.dumps({"summary": summary}) + "\n")
+        self._stream.close()
+        if os.path.abspath(file_path) != os.path.abspath(self.path):
+            os.replace(self.path, file_path)
+            self.path = file_path
+
+
+def _compression_for(path: str):
+    for compression, suffix in COMPRESSION_EXTENSIONS.items():
+        if suffix and path.endswith(suffix):
+            return compression
+    return None
+
+
+def load_game_log(file_path: str) -> dict:
+    """Loads a saved game in either format and returns the pretty-printed JSON structure."""
+    compression = _compression_for(file_path)
+    stem = file_path[:-len(COMPRESSION_EXTENSIONS[compression])] if compression else file_path
+
+    if not stem.endswith(".jsonl"):
+        with _open_text_stream(file_path, "r", compression) as f:
+            return json.load(f)
+
+    events = []
+    summary = {}
+    with _open_text_stream(file_path, "r", compression) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "summary" in record and len(record) == 1:
+                summary = record["summary"]
+            else:
+                events.append(record)
+
+    return {**summary, "log": events}
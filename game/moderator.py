@@ -1,15 +1,90 @@
 from .agent import Player
-import json
+from .events import EventLog
+from .log_sink import LogSink, MemoryLogSink
+from .checkpoint import capture_rng_state, restore_rng_state, write_checkpoint
+from .transcript import Transcript, TranscriptWindow
+from backends.generation_engine import GenerationEngine
+from backends import prompts
+from instrumentation import METRICS, MetricsRecorder
 import os 
 import time
 
+
+class VoteTally:
+    """Vote counts with the current leader maintained on every vote, so resolving is O(1)."""
+
+    def __init__(self):
+        self.counts = {}
+        self.max_votes = 0
+        self.leader = None
+        self.num_leaders = 0
+
+    def add(self, target_name: str):
+        count = self.counts.get(target_name, 0) + 1
+        self.counts[target_name] = count
+        if count > self.max_votes:
+            self.max_votes = count
+            self.leader = target_name
+            self.num_leaders = 1
+        elif count == self.max_votes:
+            self.num_leaders += 1
+
+    def tied_names(self) -> list[str]:
+        return [name for name, count in self.counts.items() if count == self.max_votes]
+
+    def __bool__(self):
+        return bool(self.counts)
+
+
 class Moderator:
-    def __init__(self, players: list[Player]):
+    def __init__(self, players: list[Player], generation_engine: GenerationEngine = None, log_sink: LogSink = None, metrics: MetricsRecorder = None,
+                 checkpoint_path: str = None, checkpoint_extra: dict = None, context_tokens: int = 0):
         self.players = players
+        self.generation_engine = generation_engine or GenerationEngine()
+        self.log_sink = log_sink or MemoryLogSink()
+        # Each game records into its own recorder, so games sharing a process (or its models) never
+        # clear each other's stats; model loads are process-wide and copied over from METRICS
+        if metrics is None:
+            metrics = MetricsRecorder()
+            metrics.model_loads.extend(METRICS.model_loads)
+        self.metrics = metrics
+        for p in players:
+            p.backend.metrics = metrics
         self.game_state = "SETUP"
         self.round_number = 0
         self.last_eliminated = None 
-        self.game_log = []
+        self._next_phase = "NIGHT"
+
+        # Written at every phase boundary so an interrupted game can be resumed (see restore_state)
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_extra = checkpoint_extra or {}
+
+        # Indexed state, updated incrementally on every elimination instead of rescanning self.players
+        self.players_by_name = {p.name: p for p in players}
+        self._eliminated_info = [
+            {"name": p.name, "role": p.role, "round": getattr(p, 'elimination_round', 'N/A')}
+            for p in players if not p.is_alive
+        ]
+        self._rebuild_indices()
+
+        # With a token budget, players also see the public transcript (see game.transcript)
+        self.context_tokens = context_tokens
+        self.transcript = Transcript() if context_tokens > 0 else None
+        self._transcript_windows = {}
+
+    def _rebuild_indices(self):
+        self._alive = {p.name: p for p in self.players if p.is_alive}
+        self._alive_by_role = {}
+        for p in self._alive.values():
+            self._alive_by_role.setdefault(p.role, {})[p.name] = p
+        self._shared_context = None
+        self._shared_context_key = None
+
+    @property
+    def game_log(self) -> EventLog:
+        """Events kept in memory; streaming sinks write them out instead and keep none."""
+        entries = getattr(self.log_sink, "entries", None)
+        return entries if entries is not None else EventLog()
 
     def _add_log_entry(self, phase: str, event_type: str, details: dict = None):
         entry = {
@@ -19,7 +94,9 @@ class Moderator:
             "timestamp": time.time(), # Useful for complex logs, requires 'import time'
             "details": details if details is not None else {}
         }
-        self.game_log.append(entry)
+        self.log_sink.write(entry)
+        if self.transcript is not None:
+            self.transcript.record(entry)
         
         # We still print for real-time viewing, but structured data is now logged
         if event_type == "ELIMINATION":
@@ -31,18 +108,22 @@ class Moderator:
 
     def get_alive_players(self, role=None):
         """Returns a list of alive Player objects, optionally filtered by role."""
-        alive = [p for p in self.players if p.is_alive]
         if role:
-            return [p for p in alive if p.role == role]
-        return alive
+            return list(self._alive_by_role.get(role, {}).values())
+        return list(self._alive.values())
 
-    def check_win_condition(self):
+    def _eliminate_player(self, player: Player):
+        player.eliminate()
+        player.elimination_round = self.round_number
+        del self._alive[player.name]
+        del self._alive_by_role[player.role][player.name]
+        self._eliminated_info.append({"name": player.name, "role": player.role, "round": self.round_number})
+        self.last_eliminated = player.name
 
-        alive_werewolves = self.get_alive_players(role="Werewolf")
-        alive_villagers = self.get_alive_players(role="Villager")
+    def check_win_condition(self):
 
-        num_werewolves = len(alive_werewolves)
-        num_villagers = len(alive_villagers)
+        num_werewolves = len(self._alive_by_role.get("Werewolf", {}))
+        num_villagers = len(self._alive_by_role.get("Villager", {}))
 
         if num_werewolves == 0:
             self.game_state = "ENDED"
@@ -54,97 +135,200 @@ class Moderator:
         
         return None
 
-    def _create_game_context(self, player: Player = None) -> dict:
-        alive_names = [p.name for p in self.get_alive_players()]
-        eliminated_info = [
-            {"name": p.name, "role": p.role, "round": p.elimination_round if hasattr(p, 'elimination_round') else 'N/A'}
-            for p in self.players if not p.is_alive
-        ]
-        
+    def _get_shared_context(self) -> dict:
+        """The part of the game context every player sees, rebuilt only when the game state changes."""
+        key = (self.round_number, self.game_state, self.last_eliminated, len(self._eliminated_info))
+        if key == self._shared_context_key:
+            return self._shared_context
+
         status_summary = f"Round {self.round_number} is starting."
         if self.last_eliminated:
             status_summary += f" Player {self.last_eliminated} was eliminated in the previous phase."
 
-        context = {
+        self._shared_context = {
             "round_number": self.round_number,
             "game_state": self.game_state,
-            "alive_players": alive_names,
-            "eliminated_players": eliminated_info,
+            "alive_players": list(self._alive),
+            "eliminated_players": list(self._eliminated_info),
             "last_eliminated": self.last_eliminated,
             "status": status_summary,
         }
+        self._shared_context_key = key
+        return self._shared_context
+
+    def _create_game_context(self, player: Player = None) -> dict:
+        # Per-player views are a shallow copy of the shared snapshot plus the player's own fields;
+        # the lists inside are shared between players and must be treated as read-only
+        context = dict(self._get_shared_context())
         
         if player:
             context["player_name"] = player.name
             context["role"] = player.role
+            if self.transcript is not None:
+                context["transcript_earlier"], context["transcript_recent"] = self._transcript_window(player).build(self.round_number)
         
         return context
 
+    def _transcript_window(self, player: Player, first_full_round: int = 0, first_summary_round: int = 0) -> TranscriptWindow:
+        window = self._transcript_windows.get(player.name)
+        if window is None:
+            budget = self.context_tokens
+            if player.backend.max_prompt_tokens is not None:
+                # Leave room for the longest prompt template: a vote over every player with the longest status line
+                longest_name = max(self.players_by_name, key=len)
+                template_context = {
+                    "role": player.role,
+                    "status": f"Round {self.round_number + 99} is starting. Player {longest_name} was eliminated in the previous phase.",
+                    "transcript_earlier": "-",
+                    "transcript_recent": "-",
+                }
+                template = prompts.selection_prompt(player.name, template_context, list(self.players_by_name))
+                budget = min(budget, player.backend.max_prompt_tokens - player.backend.count_tokens(template))
+            window = TranscriptWindow(self.transcript, budget, player.backend.count_tokens, first_full_round, first_summary_round)
+            self._transcript_windows[player.name] = window
+        return window
+
 
     def start_game(self):
-        self.game_state = "RUNNING"
-        print("\n--- Game Started! ---\n")
+        self._begin_game()
+        
+        # The phases switch game_state to NIGHT/DAY, so only a decided game ends the loop
+        while self.game_state != "ENDED":
+            if self._next_phase == "NIGHT":
+                self._start_round()
+                with self.metrics.timed("phases", "NIGHT"):
+                    self.night_phase()
+            else:
+                with self.metrics.timed("phases", "DAY"):
+                    self.day_phase()
+            self._end_phase()
         
-        while self.game_state == "RUNNING":
-            self.round_number += 1
-            print(f"\n======================================")
-            print(f"|             ROUND {self.round_number}              |")
-            print(f"======================================")
+        print(f"\n*** GAME OVER! The {self.check_win_condition()} win! ***")
 
-            self.night_phase()
-            
-            winner = self.check_win_condition()
-            if winner: break
+    def _begin_game(self):
+        if self.game_state == "SETUP":
+            self.game_state = "RUNNING"
+            print("\n--- Game Started! ---\n")
+        else:
+            print(f"\n--- Game Resumed at Round {self.round_number} ({self._next_phase} phase next) ---\n")
 
-            self.day_phase()
+    def _start_round(self):
+        self.round_number += 1
+        print(f"\n======================================")
+        print(f"|             ROUND {self.round_number}              |")
+        print(f"======================================")
 
-            winner = self.check_win_condition()
-            if winner: break
-        
-        print(f"\n*** GAME OVER! The {winner} win! ***")
+    def _end_phase(self):
+        self._next_phase = "DAY" if self._next_phase == "NIGHT" else "NIGHT"
+        self.log_sink.flush()
+        if self.check_win_condition() is None and self.checkpoint_path:
+            self.save_checkpoint()
+
+    def save_checkpoint(self):
+        log_state = self.log_sink.checkpoint()
+        if log_state is None:
+            return
+        write_checkpoint(self.checkpoint_path, {**self.checkpoint_state(), "log": log_state})
+
+    def checkpoint_state(self) -> dict:
+        """Everything needed to continue this game from the current phase boundary, except the log.
+
+        Its size depends on the number of seats, not on how long the game has run.
+        """
+        return {
+            "round_number": self.round_number,
+            "game_state": self.game_state,
+            "last_eliminated": self.last_eliminated,
+            "next_phase": self._next_phase,
+            "players": [
+                {"name": p.name, "role": p.role, "is_alive": p.is_alive, "elimination_round": getattr(p, 'elimination_round', None)}
+                for p in self.players
+            ],
+            "eliminated": self._eliminated_info,
+            "backends": {p.name: p.backend.get_state() for p in self.players},
+            "rng": capture_rng_state(),
+            "extra": self.checkpoint_extra,
+            # The transcript itself is rebuilt from the log on restore; only each player's window boundaries are kept
+            "transcript": None if self.transcript is None else {
+                "windows": {name: [w.first_full_round, w.first_summary_round] for name, w in self._transcript_windows.items()},
+            },
+        }
+
+    def restore_state(self, state: dict):
+        """Restores a game saved by `checkpoint_state` onto freshly built players with the same names and roles."""
+        self.round_number = state["round_number"]
+        self.game_state = state["game_state"]
+        self.last_eliminated = state["last_eliminated"]
+        self._next_phase = state["next_phase"]
+        for saved in state["players"]:
+            player = self.players_by_name[saved["name"]]
+            player.is_alive = saved["is_alive"]
+            if saved["elimination_round"] is not None:
+                player.elimination_round = saved["elimination_round"]
+            player.backend.set_state(state["backends"].get(saved["name"]))
+        self._eliminated_info = state["eliminated"]
+        self._rebuild_indices()
+        if self.transcript is not None and state.get("transcript"):
+            for entry in self.log_sink.read_entries():
+                self.transcript.record(entry)
+            for name, (first_full_round, first_summary_round) in state["transcript"]["windows"].items():
+                self._transcript_window(self.players_by_name[name], first_full_round, first_summary_round)
+        restore_rng_state(state["rng"])
 
     def night_phase(self):
+        werewolves, valid_targets = self._start_night()
+        if werewolves and not valid_targets:
+            return
+
+        target_name = None
+        if werewolves:
+            ww_context = self._create_game_context(werewolves[0])
+            with self.metrics.timed("decisions", "night_target"):
+                decision_data = werewolves[0].get_night_target(ww_context, valid_targets)
+            target_name = self._record_night_target(werewolves, decision_data)
+
+        self._resolve_night(target_name)
+
+    def _start_night(self):
         print("\n--- NIGHT PHASE ---")
         self.game_state = "NIGHT"
         self.last_eliminated = None
         
         werewolves = self.get_alive_players(role="Werewolf")
-        targets = []
+        valid_targets = []
         
         if werewolves:
-            valid_targets = [p.name for p in self.get_alive_players() if p.role != "Werewolf"]
+            valid_targets = [name for name, p in self._alive.items() if p.role != "Werewolf"]
             
             if not valid_targets: 
                 print("No innocent targets left for the Werewolves.")
-                return
 
-            ww_context = self._create_game_context(werewolves[0])
-            
-            decision_data = werewolves[0].get_night_target(ww_context, valid_targets)
-            target_name = decision_data["final_decision"]
-            targets.append(target_name)
+        return werewolves, valid_targets
 
-            details = decision_data.copy()
-            details.update({"werewolves": [ww.name for ww in werewolves], "target": target_name})
-            self._add_log_entry("NIGHT", "WW_TARGET", details)
+    def _record_night_target(self, werewolves: list[Player], decision_data: dict) -> str:
+        target_name = decision_data["final_decision"]
 
-            # self._add_log_entry("NIGHT", "WW_TARGET", {
-            #     "werewolves": [ww.name for ww in werewolves],
-            #     "target": target_name
-            # })
-            
-            print(f"The Werewolves agree to target: {target_name}")
+        details = decision_data.copy()
+        details.update({"werewolves": [ww.name for ww in werewolves], "target": target_name})
+        self._add_log_entry("NIGHT", "WW_TARGET", details)
+
+        # self._add_log_entry("NIGHT", "WW_TARGET", {
+        #     "werewolves": [ww.name for ww in werewolves],
+        #     "target": target_name
+        # })
+        
+        print(f"The Werewolves agree to target: {target_name}")
+        return target_name
 
+    def _resolve_night(self, target_name: str = None):
         print("\n* Morning comes... *")
         
-        if targets:
-            killed_player_name = targets[0] 
-            killed_player = next((p for p in self.players if p.name == killed_player_name), None)
+        if target_name:
+            killed_player = self.players_by_name.get(target_name)
             
             if killed_player and killed_player.is_alive:
                 print(f"Last night, {killed_player.name} was brutally attacked.")
-                killed_player.eliminate()
-                self.last_eliminated = killed_player.name
+                self._eliminate_player(killed_player)
                 self._add_log_entry("NIGHT", "ELIMINATION", {
                     "player": killed_player.name, 
                     "role": killed_player.role, 
@@ -156,38 +340,53 @@ class Moderator:
             print("No action was taken last night.")
         
     def day_phase(self):
-        print("\n--- DAY PHASE ---")
-        self.game_state = "DAY"
-        self.last_eliminated = None
-        
-        alive_players = self.get_alive_players()
+        alive_players = self._start_day()
         if not alive_players:
             return
 
         print("--- Public Discussion Starts ---")
         for player in alive_players:
             p_context = self._create_game_context(player)
-            discussion_data = player.get_day_discussion(p_context)
-            discussion = discussion_data["final_decision"]
-            details = discussion_data.copy()
-            details.update({"speaker": player.name, "role": player.role, "text": discussion})
-            self._add_log_entry("DAY", "DISCUSSION", details)
-            # self._add_log_entry("DAY", "DISCUSSION", {
-            #     "speaker": player.name, 
-            #     "role": player.role, 
-            #     "text": discussion
-            # })
-            print(f"**{player.name} ({player.role[:1]}):** {discussion}")
+            with self.metrics.timed("decisions", "discussion"):
+                discussion_data = player.get_day_discussion(p_context)
+            self._record_discussion(player, discussion_data)
         print("--- Public Discussion Ends ---")
 
+        vote_jobs = self._start_voting(alive_players)
+        # Votes are independent of each other, so they are collected first and generated as one batch
+        with self.metrics.timed("decisions", "votes"):
+            vote_results = self.generation_engine.run_target_selections(vote_jobs)
+        self._resolve_votes(alive_players, vote_results)
+
+    def _start_day(self) -> list[Player]:
+        print("\n--- DAY PHASE ---")
+        self.game_state = "DAY"
+        self.last_eliminated = None
+        
+        return self.get_alive_players()
+
+    def _record_discussion(self, player: Player, discussion_data: dict):
+        discussion = discussion_data["final_decision"]
+        details = discussion_data.copy()
+        details.update({"speaker": player.name, "role": player.role, "text": discussion})
+        self._add_log_entry("DAY", "DISCUSSION", details)
+        # self._add_log_entry("DAY", "DISCUSSION", {
+        #     "speaker": player.name, 
+        #     "role": player.role, 
+        #     "text": discussion
+        # })
+        print(f"**{player.name} ({player.role[:1]}):** {discussion}")
+
+    def _start_voting(self, alive_players: list[Player]) -> list:
+        """Returns one (backend, context, valid_targets) selection job per voter, in seat order."""
         print("\n--- Voting Begins ---")
         valid_targets = [p.name for p in alive_players]
-        vote_counts = {}
-        
-        for voter in alive_players:
-            voter_context = self._create_game_context(voter)
+        return [(voter.backend, self._create_game_context(voter), valid_targets) for voter in alive_players]
 
-            vote_data = voter.get_target_vote(voter_context, valid_targets)
+    def _resolve_votes(self, alive_players: list[Player], vote_results: list[dict]):
+        tally = VoteTally()
+        
+        for voter, vote_data in zip(alive_players, vote_results):
             target_name = vote_data["final_decision"]
 
             print(f"{voter.name} votes for {target_name}.")
@@ -196,32 +395,28 @@ class Moderator:
             details.update({"voter": voter.name, "target": target_name})
             self._add_log_entry("DAY", "VOTE", details)
             
-            vote_counts[target_name] = vote_counts.get(target_name, 0) + 1
+            tally.add(target_name)
             
             # self._add_log_entry("DAY", "VOTE", {
             #     "voter": voter.name,
             #     "target": target_name
             # })
 
-        if not vote_counts:
+        if not tally:
             print("No valid votes were cast.")
             return
 
-        lynched_name = max(vote_counts, key=vote_counts.get)
-        max_votes = vote_counts[lynched_name]
-
-        tied_players = [name for name, count in vote_counts.items() if count == max_votes]
+        max_votes = tally.max_votes
 
-        if len(tied_players) > 1:
-            print(f"There was a tie ({max_votes} votes each for {', '.join(tied_players)})! No one is cast out today.")
+        if tally.num_leaders > 1:
+            print(f"There was a tie ({max_votes} votes each for {', '.join(tally.tied_names())})! No one is cast out today.")
             return
 
-        lynched_player = next((p for p in self.players if p.name == lynched_name), None)
+        lynched_player = self.players_by_name.get(tally.leader)
         
         if lynched_player:
             print(f"\nAfter the vote, the Town decides to cast out {lynched_player.name}.")
-            lynched_player.eliminate()
-            self.last_eliminated = lynched_player.name
+            self._eliminate_player(lynched_player)
             self._add_log_entry("DAY", "ELIMINATION", {
                 "player": lynched_player.name, 
                 "role": lynched_player.role, 
@@ -235,12 +430,11 @@ class Moderator:
             "rounds_played": self.round_number,
             "winner": self.check_win_condition(),
             "players": {p.name: {"role": p.role, "initial_status": "Alive"} for p in self.players},
-            "log": self.game_log
+            "metrics": self.metrics.summary(),
         }
         
         try:
-            with open(file_path, 'w') as f:
-                json.dump(final_summary, f, indent=4)
+            self.log_sink.finalize(final_summary, file_path)
             print(f"\nSuccessfully saved game log to: {file_path}")
         except Exception as e:
             print(f"\nERROR: Could not save log file: {e}")
\ No newline at end of file
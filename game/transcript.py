@@ -0,0 +1,169 @@
+from typing import Callable, Dict, List, Tuple
+import re
+
+# Log events every player witnessed; the werewolves' private target choice is left out
+PUBLIC_EVENTS = ("DISCUSSION", "VOTE", "ELIMINATION")
+
+# Shown in place of the summaries a window has dropped, so the player knows the record is incomplete
+OMITTED_MARKER = "(Earlier rounds omitted.)"
+
+
+class Transcript:
+    """The public record of a game, grouped by round, with a cached one-line summary per finished round."""
+
+    def __init__(self):
+        self.events = []
+        self.rounds: Dict[int, List[str]] = {}
+        self._round_events: Dict[int, List[Dict]] = {}
+        self._summaries: Dict[int, str] = {}
+
+    def record(self, entry: Dict):
+        """Adds a moderator log entry if it is public; other entries are ignored."""
+        if entry["event_type"] not in PUBLIC_EVENTS:
+            return
+        details = entry["details"]
+        event = {"round": entry["round"], "event_type": entry["event_type"]}
+        if entry["event_type"] == "DISCUSSION":
+            # Causal LMs echo their prompt; only what the player actually said is public
+            text, prompt = details["text"], details.get("prompt_used")
+            if prompt and text.startswith(prompt):
+                text = text[len(prompt):].strip()
+            event.update(speaker=details["speaker"], text=text)
+        elif entry["event_type"] == "VOTE":
+            event.update(voter=details["voter"], target=details["target"])
+        else:
+            event.update(player=details["player"], role=details["role"], reason=details["reason"])
+        self.add_event(event)
+
+    def add_event(self, event: Dict):
+        self.events.append(event)
+        self.rounds.setdefault(event["round"], []).append(self._render(event))
+        self._round_events.setdefault(event["round"], []).append(event)
+
+    @staticmethod
+    def _render(event: Dict) -> str:
+        if event["event_type"] == "DISCUSSION":
+            return f"{event['speaker']}: {event['text']}"
+        if event["event_type"] == "VOTE":
+            return f"{event['voter']} voted for {event['target']}."
+        if event["reason"] == "Werewolf Attack":
+            return f"{event['player']} ({event['role']}) was killed in the night."
+        return f"{event['player']} ({event['role']}) was voted out."
+
+    def summary(self, round_number: int) -> str:
+        """Rule-based digest of a finished round: who was killed, who accused whom, how the vote went."""
+        if round_number in self._summaries:
+            return self._summaries[round_number]
+
+        events = self._round_events.get(round_number, [])
+        speakers = [e["speaker"] for e in events if e["event_type"] == "DISCUSSION"]
+        parts = []
+        for e in events:
+            if e["event_type"] == "ELIMINATION" and e["reason"] == "Werewolf Attack":
+                parts.append(f"{e['player']} ({e['role']}) was killed in the night")
+
+        accusations = []
+        name_pattern = re.compile(r"\b(" + "|".join(re.escape(name) for name in speakers) + r")\b") if speakers else None
+        for e in events:
+            if e["event_type"] == "DISCUSSION":
+                # The first other player a speaker mentions is taken as the one they suspect
+                mentioned = [m.group(1) for m in name_pattern.finditer(e["text"]) if m.group(1) != e["speaker"]]
+                if mentioned:
+                    accusations.append(f"{e['speaker']} suspected {mentioned[0]}")
+        if accusations:
+            parts.append(", ".join(accusations))
+
+        votes = {}
+        for e in events:
+            if e["event_type"] == "VOTE":
+                votes[e["target"]] = votes.get(e["target"], 0) + 1
+        if votes:
+            parts.append("votes: " + ", ".join(f"{name} x{count}" for name, count in sorted(votes.items(), key=lambda kv: -kv[1])))
+
+        for e in events:
+            if e["event_type"] == "ELIMINATION" and e["reason"] != "Werewolf Attack":
+                parts.append(f"{e['player']} ({e['role']}) was voted out")
+
+        self._summaries[round_number] = f"Round {round_number}: " + ("; ".join(parts) if parts else "nothing happened") + "."
+        return self._summaries[round_number]
+
+
+class TranscriptWindow:
+    """One player's view of the transcript, kept under `max_tokens`.
+
+    Each line is tokenized once, when the player first sees it. When the window is over budget the
+    oldest round still shown in full is replaced by its summary, and after that the oldest summary is
+    dropped. Both boundaries only move forward, so the earlier part of a player's prompt stays
+    identical between turns and can be prefix-cached.
+    """
+
+    def __init__(self, transcript: Transcript, max_tokens: int, count_tokens: Callable[[str], int],
+                 first_full_round: int = 0, first_summary_round: int = 0):
+        self.transcript = transcript
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens
+        self.first_full_round = first_full_round
+        # Rounds before this one are left out entirely, in favour of OMITTED_MARKER
+        self.first_summary_round = first_summary_round
+        self._line_tokens: Dict[int, List[int]] = {}
+        self._round_totals: Dict[int, int] = {}
+        self._summary_tokens: Dict[int, int] = {}
+
+    def _round_tokens(self, round_number: int) -> int:
+        lines = self.transcript.rounds.get(round_number, [])
+        counts = self._line_tokens.setdefault(round_number, [])
+        if len(counts) < len(lines):
+            # Lines are joined with newlines, which cost a token each
+            new_counts = [self.count_tokens(line) + 1 for line in lines[len(counts):]]
+            counts.extend(new_counts)
+            self._round_totals[round_number] = self._round_totals.get(round_number, 0) + sum(new_counts)
+        return self._round_totals.get(round_number, 0)
+
+    def _summary_cost(self, round_number: int) -> int:
+        if round_number not in self._summary_tokens:
+            self._summary_tokens[round_number] = self.count_tokens(self.transcript.summary(round_number)) + 1
+        return self._summary_tokens[round_number]
+
+    def _omitted(self, rounds: List[int]) -> bool:
+        return bool(rounds) and rounds[0] < self.first_summary_round
+
+    def build(self, current_round: int) -> Tuple[str, str]:
+        """Returns (earlier, recent): summaries plus finished rounds in full, and the current round's lines."""
+        rounds = sorted(r for r in self.transcript.rounds if r <= current_round)
+        marker_cost = self.count_tokens(OMITTED_MARKER) + 1
+        summarized = [r for r in rounds if self.first_summary_round <= r < self.first_full_round]
+        total = sum(self._summary_cost(r) for r in summarized) + sum(self._round_tokens(r) for r in rounds if r >= self.first_full_round)
+        if self._omitted(rounds):
+            total += marker_cost
+
+        # Finished rounds are compressed oldest first; the current round is never summarised
+        while total > self.max_tokens and self.first_full_round < current_round:
+            r = self.first_full_round
+            if r in self.transcript.rounds:
+                total += self._summary_cost(r) - self._round_tokens(r)
+                summarized.append(r)
+            self.first_full_round += 1
+
+        # Still over budget: drop the oldest summaries before touching what is happening now
+        while total > self.max_tokens and summarized:
+            if not self._omitted(rounds):
+                total += marker_cost
+            r = summarized.pop(0)
+            total -= self._summary_cost(r)
+            self.first_summary_round = r + 1
+
+        # Only the current round is left over budget: keep its newest lines
+        recent = list(self.transcript.rounds.get(current_round, []))
+        if current_round >= self.first_full_round and recent:
+            counts = self._line_tokens[current_round]
+            skip = 0
+            while total > self.max_tokens and skip < len(recent):
+                total -= counts[skip]
+                skip += 1
+            recent = recent[skip:]
+
+        earlier = ([OMITTED_MARKER] if self._omitted(rounds) else []) + [self.transcript.summary(r) for r in summarized]
+        for r in rounds:
+            if self.first_full_round <= r < current_round:
+                earlier.extend(self.transcript.rounds[r])
+        return "\n".join(earlier), "\n".join(recent)
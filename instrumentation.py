@@ -0,0 +1,141 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linearly interpolated percentile (q in [0, 100]) of an unsorted list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _latency_stats(samples: List[float]) -> Dict:
+    return {
+        "count": len(samples),
+        "total_seconds": sum(samples),
+        "p50_seconds": percentile(samples, 50),
+        "p95_seconds": percentile(samples, 95),
+    }
+
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return None
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class MetricsRecorder:
+    """Collects timings for one game: phases, decisions and model generation calls.
+
+    Model load times survive `reset` because models are shared across the games a process plays.
+    Recording is thread-safe so the async moderator's worker threads can report concurrently.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.model_loads = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.phases = defaultdict(list)
+            self.decisions = defaultdict(list)
+            self.generations = defaultdict(list)
+
+    @contextmanager
+    def timed(self, category: str, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                getattr(self, category)[name].append(elapsed)
+
+    def record_generation(self, kind: str, prompt_tokens: int, generated_tokens: int, tokenize_seconds: float, generate_seconds: float):
+        with self._lock:
+            self.generations[kind].append((prompt_tokens, generated_tokens, tokenize_seconds, generate_seconds))
+
+    def record_model_load(self, model_name: str, seconds: float):
+        with self._lock:
+            self.model_loads.append({"model": model_name, "seconds": seconds})
+
+    def samples(self) -> Dict:
+        """Raw measurements, suitable for merging across games with `aggregate_reports`."""
+        with self._lock:
+            return {
+                "phases": {k: list(v) for k, v in self.phases.items()},
+                "decisions": {k: list(v) for k, v in self.decisions.items()},
+                "generations": {k: [list(g) for g in v] for k, v in self.generations.items()},
+                "model_loads": list(self.model_loads),
+                "peak_rss_mb": peak_rss_mb(),
+            }
+
+    def summary(self) -> Dict:
+        return summarize(self.samples())
+
+
+def summarize(samples: Dict) -> Dict:
+    phases = {name: _latency_stats(values) for name, values in samples["phases"].items()}
+    decisions = {name: _latency_stats(values) for name, values in samples["decisions"].items()}
+
+    generations = {}
+    for kind, calls in samples["generations"].items():
+        prompt_tokens = sum(c[0] for c in calls)
+        generated_tokens = sum(c[1] for c in calls)
+        generate_seconds = sum(c[3] for c in calls)
+        generations[kind] = {
+            "calls": len(calls),
+            "prompt_tokens": prompt_tokens,
+            "generated_tokens": generated_tokens,
+            "tokenize_seconds": sum(c[2] for c in calls),
+            "generate_seconds": generate_seconds,
+            "tokens_per_sec": generated_tokens / generate_seconds if generate_seconds > 0 else None,
+            "p50_generate_seconds": percentile([c[3] for c in calls], 50),
+            "p95_generate_seconds": percentile([c[3] for c in calls], 95),
+        }
+
+    # Whatever phase time is not spent waiting on a decision is moderator logic, logging and printing
+    phase_seconds = sum(s["total_seconds"] for s in phases.values())
+    decision_seconds = sum(s["total_seconds"] for s in decisions.values())
+
+    return {
+        "phases": phases,
+        "decisions": decisions,
+        "generations": generations,
+        "moderator_overhead_seconds": phase_seconds - decision_seconds,
+        "model_loads": samples["model_loads"],
+        "peak_rss_mb": samples["peak_rss_mb"],
+    }
+
+
+def aggregate_reports(game_samples: List[Dict]) -> Dict:
+    """Merges the raw samples of many games (possibly from different processes) into one summary."""
+    merged = {"phases": defaultdict(list), "decisions": defaultdict(list), "generations": defaultdict(list), "model_loads": [], "peak_rss_mb": None}
+    for samples in game_samples:
+        for category in ("phases", "decisions", "generations"):
+            for name, values in samples[category].items():
+                merged[category][name].extend(values)
+        merged["model_loads"].extend(load for load in samples["model_loads"] if load not in merged["model_loads"])
+        if samples["peak_rss_mb"] is not None:
+            merged["peak_rss_mb"] = max(merged["peak_rss_mb"] or 0, samples["peak_rss_mb"])
+
+    report = summarize(merged)
+    report["games"] = len(game_samples)
+    return report
+
+
+METRICS = MetricsRecorder()
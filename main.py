@@ -1,36 +1,84 @@
-from game.moderator import Moderator
-from game.agent import Player, Villager, Werewolf
-from backends import *
+from experiment import (
+    PRECISIONS, append_manifest, find_replay_logs, read_manifest, release_models, replay_prompt_sizing,
+    run_games_parallel, run_games_sequential, run_replay_game, start_manifest
+)
+from backends import available_backends
+from instrumentation import aggregate_reports
 import argparse
+import json
 import random
 import os
 import time
-from typing import List, Dict
 
-def assign_roles_and_backends(num_players: int, num_human: int, model_name: str) -> List[Player]:
-    if num_human > num_players:
-        raise ValueError("Number of human players cannot exceed total number of players.")
+def print_run_report(report: dict, output_dir: str = None):
+    print("\n--- Performance Report ---")
+    for category in ("phases", "decisions"):
+        for name, stats in report[category].items():
+            print(f"{category[:-1]} {name}: n={stats['count']} p50={stats['p50_seconds']:.3f}s p95={stats['p95_seconds']:.3f}s")
+    for kind, stats in report["generations"].items():
+        rate = f"{stats['tokens_per_sec']:.1f} tok/s" if stats["tokens_per_sec"] else "n/a"
+        print(
+            f"generation {kind}: calls={stats['calls']} {rate}, p50={stats['p50_generate_seconds']:.3f}s "
+            f"p95={stats['p95_generate_seconds']:.3f}s, tokenize={stats['tokenize_seconds']:.3f}s total"
+        )
+    print(f"moderator overhead: {report['moderator_overhead_seconds']:.3f}s total")
+    for load in report["model_loads"]:
+        print(f"model load {load['model']}: {load['seconds']:.1f}s")
+    if report["peak_rss_mb"] is not None:
+        print(f"peak RSS: {report['peak_rss_mb']:.0f} MB")
 
-    player_names = [f"Player_{i+1}" for i in range(num_players)]
-    
-    num_werewolves = max(1, num_players // 4)
-    roles = ([Werewolf] * num_werewolves) + ([Villager] * (num_players - num_werewolves))
-    random.shuffle(roles)
-    
-    player_configs = []
-    for i, name in enumerate(player_names):
-        role_class = roles[i]
-        
-        if i < num_human:
-            backend = HumanBackend(name=name)
-            print(f"Setting up Human player: {name} as {role_class.__name__}")
-        else:
-            backend = LocalTransformerBackend(name=name, model_name=model_name)
-            print(f"Setting up LLM player: {name} as {role_class.__name__} with model {model_name}")
-            
-        player_configs.append(role_class(name, backend))
-        
-    return player_configs
+    if output_dir is not None:
+        report_path = os.path.join(output_dir, f"run_report_{time.strftime('%Y%m%d-%H%M%S')}.json")
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"Saved performance report to: {report_path}")
+
+
+def experiment_config(args) -> dict:
+    """The game options from the command line, shared by new experiments and replays."""
+    return {
+        "players": args.players,
+        "human": args.human,
+        "model": args.model,
+        "backend": args.backend,
+        "server": args.server,
+        "precision": args.precision,
+        "compile": args.compile,
+        "selection": args.selection,
+        "context_tokens": args.context_tokens,
+        "draft_model": args.draft_model,
+        "fast_decoding": args.fast_decoding,
+        "discussion_tokens": args.discussion_tokens,
+        "selection_tokens": args.selection_tokens,
+        "async": args.use_async,
+        "concurrent_discussion": args.concurrent_discussion,
+        "log_format": args.log_format,
+        "log_compression": None if args.log_compression == "none" else args.log_compression,
+    }
+
+
+def replay_logs(args, output_dir: str = None):
+    log_paths = find_replay_logs(args.replay)
+    print(f"\n--- Replaying {len(log_paths)} saved games ---")
+    config = experiment_config(args)
+
+    prompt_sizing = replay_prompt_sizing(config)
+    # Models are only loaded on the first cache miss, then kept for the remaining games
+    held_models = []
+    game_metrics = []
+    try:
+        for i, log_path in enumerate(log_paths, start=1):
+            result = run_replay_game(config, log_path, output_dir, prompt_sizing, held_models)
+            changed = "" if result["winner"] == result["original_winner"] else f" (originally {result['original_winner']})"
+            print(
+                f"[Replayed {i}/{len(log_paths)}] {os.path.basename(log_path)}: {result['winner']} win{changed}, "
+                f"{result['cache_hits']} cached / {result['cache_misses']} live decisions ({result['wall_seconds']:.2f}s)"
+            )
+            game_metrics.append(result["metrics"])
+    finally:
+        release_models(held_models)
+
+    print_run_report(aggregate_reports(game_metrics), output_dir)
 
 
 def main():
@@ -59,10 +107,97 @@ def main():
         default="openai-community/gpt2",
         help=(
             "Hugging Face model ID for LLM players (e.g., 'gpt2', 'bert-base-uncased').\n"
-            "This should be a model compatible with AutoModelForCausalLM."
+            "This should be a model compatible with AutoModelForCausalLM.\n"
+            "Pass a comma separated list to mix models; they are assigned round-robin to LLM seats."
         )
     )
     
+    parser.add_argument(
+        "-b", "--backend",
+        choices=available_backends(),
+        default="hf",
+        help=(
+            "Backend for non-human players. 'hf' runs a local Hugging Face model,\n"
+            "'mock' returns random decisions instantly (for load-testing the game engine),\n"
+            "'remote' sends prompts to a running inference server (see --server).\n"
+            "Plugins can add more through the 'deceptivellms.backends' entry point group. Default is hf."
+        )
+    )
+
+    parser.add_argument(
+        "--server",
+        default="http://127.0.0.1:8765",
+        help=(
+            "URL of the inference server used by --backend remote. Start one with\n"
+            "'python -m backends.inference_server --model <id>'; many games and workers can share it."
+        )
+    )
+
+    parser.add_argument(
+        "--precision",
+        choices=list(PRECISIONS),
+        default="fp32",
+        help=(
+            "Weight precision for LLM players: fp32, bf16, or int8 (dynamic quantization, CPU only).\n"
+            "Default is fp32."
+        )
+    )
+
+    parser.add_argument(
+        "--compile",
+        action="store_true",
+        help="Compile the model's forward pass with torch.compile (slower first game, faster afterwards)."
+    )
+
+    parser.add_argument(
+        "--selection",
+        choices=["generate", "score"],
+        default="generate",
+        help=(
+            "How LLM players pick vote/night targets. 'generate' samples text and looks for a name,\n"
+            "'score' ranks every valid target by its log-probability and logs the distribution. Default is generate."
+        )
+    )
+
+    parser.add_argument(
+        "--draft_model",
+        default=None,
+        help=(
+            "Small model with the same tokenizer (e.g. distilbert/distilgpt2 for gpt2) that drafts tokens\n"
+            "for the main model to verify (assisted decoding). Disables batched votes."
+        )
+    )
+
+    parser.add_argument(
+        "--fast_decoding",
+        action="store_true",
+        help="Stop each generation at the first sentence end, line break or new speaker turn, or when it starts repeating the prompt."
+    )
+
+    parser.add_argument(
+        "--discussion_tokens",
+        type=int,
+        default=None,
+        help="Maximum new tokens per discussion turn. Default is 50."
+    )
+
+    parser.add_argument(
+        "--selection_tokens",
+        type=int,
+        default=None,
+        help="Maximum new tokens per vote or night target. Default is 50."
+    )
+
+    parser.add_argument(
+        "--context_tokens",
+        type=int,
+        default=0,
+        help=(
+            "Show LLM players the public game transcript, kept under this many tokens per player;\n"
+            "older rounds are replaced by short summaries. Default is 0 (status line only)."
+        )
+    )
+
     parser.add_argument(
         "-r", "--runs", 
         type=int, 
@@ -70,6 +205,61 @@ def main():
         help="Number of times to run the game for statistical experiments. Default is 1."
     )
 
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=1,
+        help=(
+            "Number of worker processes playing games in parallel. Default is 1.\n"
+            "Each worker loads the model once and plays many games; requires --human 0."
+        )
+    )
+
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help=(
+            "Run each game with the asyncio moderator: votes from all seats are requested concurrently\n"
+            "and a human typing does not block model generation for other seats."
+        )
+    )
+
+    parser.add_argument(
+        "--concurrent_discussion",
+        action="store_true",
+        help="With --async, prepare every player's discussion statement concurrently before it is read out."
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Base random seed. Run i is seeded with seed + i. Default is a random seed."
+    )
+
+    parser.add_argument(
+        "--replay",
+        nargs="+",
+        metavar="LOG",
+        help=(
+            "Replay saved game logs (files or directories) instead of playing new games.\n"
+            "Recorded outputs are served by prompt; only cache misses call the --backend/--model.\n"
+            "--context_tokens and the decoding options (--discussion_tokens, --selection_tokens, --draft_model,\n"
+            "--fast_decoding) must match the recording; the first three size the transcript in each prompt,\n"
+            "so with other values the prompts differ and every decision misses the cache."
+        )
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "Continue the interrupted experiment in experiments_data: runs listed in its manifest are skipped\n"
+            "and games with a checkpoint continue from their last completed phase."
+        )
+    )
+
     parser.add_argument(
         "-s", "--save_logs", 
         type=int, 
@@ -77,8 +267,26 @@ def main():
         help="Save the game logs to files (1 to save, 0 to not save). Default is 1."
     )
 
+    parser.add_argument(
+        "--log_format",
+        choices=["json", "jsonl"],
+        default="json",
+        help=(
+            "Game log format. 'json' writes one pretty-printed file at the end of the game,\n"
+            "'jsonl' streams events to disk as they happen. Default is json."
+        )
+    )
+
+    parser.add_argument(
+        "--log_compression",
+        choices=["none", "gzip", "zstd"],
+        default="none",
+        help="Compression for jsonl game logs (zstd requires the 'zstandard' package). Default is none."
+    )
+
     args = parser.parse_args()
 
+    OUTPUT_DIR = None
     if args.save_logs not in [0, 1]:
         print("\nERROR: --save_logs must be either 0 (do not save) or 1 (save).")
         return
@@ -87,6 +295,10 @@ def main():
         os.makedirs(OUTPUT_DIR, exist_ok=True)
         print(f"Saving experiment data to: {OUTPUT_DIR}")
 
+    if args.replay:
+        replay_logs(args, OUTPUT_DIR)
+        return
+
     if args.human > args.players:
         print("\nERROR: The number of human players cannot be greater than the total number of players.")
         return
@@ -94,27 +306,56 @@ def main():
     if args.players < 4:
         print("\nERROR: The game requires a minimum of 4 players.")
         return
-        
-    print(f"\n--- Starting {args.runs} Game Experiment Runs ---")
-    print(f"Configuration: {args.players} Total Players, {args.human} Human, LLM Model: {args.model}")
 
-    all_players = assign_roles_and_backends(args.players, args.human, args.model)
-    
-    for i in range(args.runs):
-        print(f"\n[Experiment Run {i + 1}/{args.runs}]")
-        
-        game_instance = Moderator(all_players)
-        game_instance.start_game()
-        timestamp = time.strftime("%Y%m%d-%H%M%S")
-        filename = f"game_{timestamp}_r{game_instance.round_number}_{game_instance.check_win_condition()}_{args.players}p.json"
-        
-        game_instance.save_log(os.path.join(OUTPUT_DIR, filename))
-        
-        for p in all_players:
-            p.is_alive = True
-            if hasattr(p, 'elimination_round'):
-                del p.elimination_round
+    if args.resume and OUTPUT_DIR is None:
+        print("\nERROR: --resume requires --save_logs 1.")
+        return
         
+    runs = args.runs
+    pending = None
+    already_done = 0
+    if args.resume:
+        header, completed_runs = read_manifest(OUTPUT_DIR)
+        if header is None:
+            print(f"\nERROR: No experiment manifest to resume in {OUTPUT_DIR}.")
+            return
+        # The interrupted experiment's own configuration and seeds take precedence over the command line
+        config, runs, base_seed = header["config"], header["runs"], header["base_seed"]
+        config["resume"] = True
+        finished = {record["run"] for record in completed_runs}
+        pending = [i for i in range(runs) if i not in finished]
+        already_done = len(finished)
+        print(f"\n--- Resuming Experiment: {already_done}/{runs} runs already complete ---")
+    else:
+        config = experiment_config(args)
+        base_seed = args.seed if args.seed is not None else random.randrange(2**31)
+        if OUTPUT_DIR is not None:
+            start_manifest(OUTPUT_DIR, config, runs, base_seed)
+        print(f"\n--- Starting {runs} Game Experiment Runs ---")
+
+    if args.workers > 1 and config["human"] > 0:
+        print("\nERROR: --workers greater than 1 requires --human 0.")
+        return
+
+    print(f"Configuration: {config['players']} Total Players, {config['human']} Human, LLM Model: {config['model']}")
+    print(f"Base seed: {base_seed}")
+
+    if args.workers > 1:
+        results = run_games_parallel(config, runs, args.workers, base_seed, OUTPUT_DIR, pending)
+    else:
+        results = run_games_sequential(config, runs, base_seed, OUTPUT_DIR, pending)
+
+    game_metrics = []
+    for completed, result in enumerate(results, start=already_done + 1):
+        print(
+            f"[Finished {completed}/{runs}] Run {result['run'] + 1}: {result['winner']} win "
+            f"after {result['rounds']} rounds ({result['wall_seconds']:.1f}s, seed {result['seed']})"
+        )
+        game_metrics.append(result["metrics"])
+        if OUTPUT_DIR is not None:
+            append_manifest(OUTPUT_DIR, result)
+
+    print_run_report(aggregate_reports(game_metrics), OUTPUT_DIR)
         
     print("\n--- Experiment Complete ---")
 
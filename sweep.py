@@ -0,0 +1,235 @@
+"""Adaptive sweep over player counts, werewolf ratios and models.
+
+Every cell of the grid first plays --min_games games. After that each free worker is given to the
+cell whose werewolf win-rate confidence interval is currently widest, and a cell stops as soon as
+its Wilson interval is narrower than --ci_width (or it reaches --max_games).
+
+    python sweep.py --players 6 8 12 --ratios 0.17 0.25 0.33 --models gpt2 --workers 4 --ci_width 0.2
+"""
+from experiment import PRECISIONS, acquire_models, init_worker, num_werewolves_for, release_models, run_quiet_game
+from backends import available_backends
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import product
+from statistics import NormalDist
+from typing import Dict, List, Tuple
+import argparse
+import json
+import math
+import os
+import random
+import time
+
+
+def wilson_interval(successes: int, n: int, z: float = 1.96) -> Tuple[float, float]:
+    """Wilson score interval for a binomial proportion; (0, 1) before any observations."""
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - half_width), min(1.0, centre + half_width)
+
+
+class SweepCell:
+    """One grid configuration and the werewolf wins observed for it so far."""
+
+    def __init__(self, index: int, config: Dict):
+        self.index = index
+        self.config = config
+        self.games = 0
+        self.werewolf_wins = 0
+        self.in_flight = 0
+        self.wall_seconds = 0.0
+
+    @property
+    def label(self) -> str:
+        return f"{self.config['players']}p_ww{self.config['werewolf_ratio']}_{self.config['model']}"
+
+    def width(self, z: float) -> float:
+        low, high = wilson_interval(self.werewolf_wins, self.games, z)
+        return high - low
+
+    def projected_width(self, z: float) -> float:
+        """Expected interval width once the games already in flight report back."""
+        n = self.games + self.in_flight
+        if n == 0:
+            return 1.0
+        # Smoothed estimate so a cell with 0 or n wins so far is not treated as certain
+        p = (self.werewolf_wins + 0.5) / (self.games + 1)
+        low, high = wilson_interval(p * n, n, z)
+        return high - low
+
+    def summary(self, z: float) -> Dict:
+        low, high = wilson_interval(self.werewolf_wins, self.games, z)
+        return {
+            "players": self.config["players"],
+            "werewolves": num_werewolves_for(self.config["players"], self.config["werewolf_ratio"]),
+            "werewolf_ratio": self.config["werewolf_ratio"],
+            "model": self.config["model"],
+            "games": self.games,
+            "werewolf_wins": self.werewolf_wins,
+            "werewolf_win_rate": self.werewolf_wins / self.games if self.games else None,
+            "ci_low": low,
+            "ci_high": high,
+            "wall_seconds": self.wall_seconds,
+        }
+
+
+class AdaptiveSweep:
+
+    def __init__(self, cells: List[SweepCell], ci_width: float, confidence: float = 0.95, min_games: int = 10,
+                 max_games: int = 200, base_seed: int = 0, output_dir: str = None):
+        self.cells = cells
+        self.ci_width = ci_width
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        self.min_games = min_games
+        self.max_games = max_games
+        self.base_seed = base_seed
+        self.output_dir = output_dir
+
+    def _needs_games(self, cell: SweepCell) -> bool:
+        allocated = cell.games + cell.in_flight
+        if allocated < self.min_games:
+            return True
+        return allocated < self.max_games and cell.projected_width(self.z) > self.ci_width
+
+    def next_cell(self) -> SweepCell:
+        """The cell that gains the most from one more game, or None when every cell is settled or waiting."""
+        candidates = [cell for cell in self.cells if self._needs_games(cell)]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda cell: (cell.games + cell.in_flight < self.min_games, cell.projected_width(self.z)))
+
+    def _cell_output_dir(self, cell: SweepCell) -> str:
+        if self.output_dir is None:
+            return None
+        path = os.path.join(self.output_dir, cell.label.replace("/", "_").replace(",", "+"))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _submit(self, submit, cell: SweepCell) -> Future:
+        run_index = cell.games + cell.in_flight
+        # Seeds depend only on the cell and run index, so a cell's games do not depend on scheduling order
+        seed = self.base_seed + cell.index * self.max_games + run_index
+        cell.in_flight += 1
+        return submit(run_quiet_game, cell.config, run_index, seed, self._cell_output_dir(cell))
+
+    def _record(self, cell: SweepCell, result: Dict):
+        cell.in_flight -= 1
+        cell.games += 1
+        cell.werewolf_wins += result["winner"] == "Werewolves"
+        cell.wall_seconds += result["wall_seconds"]
+        if not self._needs_games(cell) and cell.in_flight == 0:
+            status = "converged" if cell.width(self.z) <= self.ci_width else "hit --max_games"
+            print(f"[Cell {cell.label}] {status} after {cell.games} games: werewolf win rate "
+                  f"{cell.werewolf_wins / cell.games:.2f} (width {cell.width(self.z):.3f})")
+
+    def run(self, workers: int = 1) -> List[Dict]:
+        # Every model in the grid is loaded once and reused for all games, in-process or per worker
+        models = ",".join(sorted({cell.config["model"] for cell in self.cells}))
+        worker_config = {**self.cells[0].config, "model": models}
+        if workers <= 1:
+            def submit(func, *args):
+                future = Future()
+                future.set_result(func(*args))
+                return future
+            handles = acquire_models(worker_config)
+            try:
+                self._drive(submit, slots=1)
+            finally:
+                release_models(handles)
+        else:
+            threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(worker_config, threads_per_worker)) as pool:
+                self._drive(pool.submit, slots=workers)
+        return [cell.summary(self.z) for cell in self.cells]
+
+    def _drive(self, submit, slots: int):
+        running = {}
+        while True:
+            while len(running) < slots:
+                cell = self.next_cell()
+                if cell is None:
+                    break
+                running[self._submit(submit, cell)] = cell
+            if not running:
+                return
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                self._record(running.pop(future), future.result())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep game configurations, stopping each one once its werewolf win rate is known precisely enough.")
+    parser.add_argument("--players", type=int, nargs="+", default=[6, 8, 12])
+    parser.add_argument("--ratios", type=float, nargs="+", default=[0.25], help="Fraction of seats that are werewolves.")
+    parser.add_argument("--models", nargs="+", default=["openai-community/gpt2"], help="One entry per cell; comma separated entries mix models within a game.")
+    parser.add_argument("-b", "--backend", choices=available_backends(), default="hf")
+    parser.add_argument("--server", default="http://127.0.0.1:8765")
+    parser.add_argument("--precision", choices=list(PRECISIONS), default="fp32")
+    parser.add_argument("--compile", action="store_true")
+    parser.add_argument("--selection", choices=["generate", "score"], default="generate")
+    parser.add_argument("--ci_width", type=float, default=0.2, help="Stop a cell once its confidence interval is narrower than this.")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--min_games", type=int, default=10)
+    parser.add_argument("--max_games", type=int, default=200)
+    parser.add_argument("-w", "--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("-s", "--save_logs", type=int, default=1, help="0 to discard game logs, 1 to save them per cell.")
+    args = parser.parse_args()
+
+    if min(args.players) < 4:
+        print("\nERROR: The game requires a minimum of 4 players.")
+        return
+
+    output_dir = None
+    if args.save_logs == 1:
+        output_dir = os.path.join("experiments_data", f"sweep_{time.strftime('%Y%m%d-%H%M%S')}")
+        os.makedirs(output_dir, exist_ok=True)
+        print(f"Saving sweep data to: {output_dir}")
+
+    cells = []
+    seen = set()
+    for players, ratio, model in product(args.players, args.ratios, args.models):
+        # Ratios that round to the same number of werewolves describe the same game
+        key = (players, num_werewolves_for(players, ratio), model)
+        if key in seen:
+            continue
+        seen.add(key)
+        config = {
+            "players": players,
+            "human": 0,
+            "model": model,
+            "backend": args.backend,
+            "server": args.server,
+            "precision": args.precision,
+            "compile": args.compile,
+            "selection": args.selection,
+            "werewolf_ratio": ratio,
+        }
+        cells.append(SweepCell(len(cells), config))
+
+    base_seed = args.seed if args.seed is not None else random.randrange(2**31)
+    print(f"\n--- Sweeping {len(cells)} cells (target CI width {args.ci_width}, base seed {base_seed}) ---")
+    sweep = AdaptiveSweep(cells, args.ci_width, args.confidence, args.min_games, args.max_games, base_seed, output_dir)
+    start = time.perf_counter()
+    results = sweep.run(args.workers)
+    elapsed = time.perf_counter() - start
+
+    print("\n--- Sweep Results ---")
+    for r in results:
+        print(f"{r['players']:>3}p {r['werewolves']} werewolves {r['model']}: {r['werewolf_wins']}/{r['games']} werewolf wins, "
+              f"{args.confidence:.0%} CI [{r['ci_low']:.2f}, {r['ci_high']:.2f}]")
+    total_games = sum(r["games"] for r in results)
+    print(f"Played {total_games} games in {elapsed:.1f}s ({len(cells) * args.max_games} with a fixed --max_games per cell).")
+
+    if output_dir is not None:
+        summary_path = os.path.join(output_dir, "sweep.json")
+        with open(summary_path, 'w') as f:
+            json.dump({"args": vars(args), "base_seed": base_seed, "wall_seconds": elapsed, "cells": results}, f, indent=4)
+        print(f"Saved sweep summary to: {summary_path}")
+
+
+if __name__ == "__main__":
+    main()